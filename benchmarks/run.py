@@ -0,0 +1,364 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import traceback
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from launch import PARAMETERS
+
+SCALE = 25
+
+BENCHMARKS = {}
+
+
+def benchmark(number: int = 1, repeat: int = 5, qt: bool = False):
+    # func(setup_result) is timed, setup runs once outside of the timing
+    def decorator(setup):
+        BENCHMARKS[setup.__name__] = (setup, number, repeat, qt)
+        return setup
+    return decorator
+
+
+def measure(func, number: int, repeat: int):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        for j in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+_application = None
+
+
+def application():
+    global _application
+    if _application is None:
+        from PyQt5 import QtWidgets
+        _application = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    return _application
+
+
+def _paint(item):
+    from PyQt5.QtGui import QImage, QPainter
+    from PyQt5.QtWidgets import QStyleOptionGraphicsItem
+
+    image = QImage(800, 800, QImage.Format_ARGB32_Premultiplied)
+    option = QStyleOptionGraphicsItem()
+
+    def paint():
+        painter = QPainter(image)
+        item.paint(painter, option, None)
+        painter.end()
+    return paint
+
+
+@benchmark(number=10)
+def kepler_evaluate_1e6():
+    from explorer.engine import SimulationEngine
+
+    controller = SimulationEngine(PARAMETERS).sun_controller
+    times = np.linspace(0, 1e5, 1000000)
+    return lambda: controller.evaluate(times)
+
+
+@benchmark(number=10000)
+def kepler_scalar():
+    from explorer.engine import SimulationEngine
+
+    controller = SimulationEngine(PARAMETERS).sun_controller
+    return lambda: (controller.distance(1234.5), controller.rotation(1234.5))
+
+
+@benchmark(number=20)
+def spiral_path_generation():
+    from explorer.graphical_items import spirals
+
+    def generate():
+        spirals.archimedean_path.cache_clear()
+        spirals.logarithmic_path.cache_clear()
+
+        ro, limit = 2.48 * SCALE, 400
+        chunks = spirals.archimedean_rotations(ro, 1, 0, limit)
+        spirals.archimedean_path(ro, 1, *chunks, limit)
+        for delta in (-8.75, 0, 8.75):
+            chunks = spirals.logarithmic_rotations(3 * SCALE, 0.218, 1, 0, limit - delta)
+            spirals.logarithmic_path(3 * SCALE, 0.218, delta, 1, *chunks, limit)
+    return generate
+
+
+@benchmark(number=100, qt=True)
+def paint_orbit():
+    from explorer.graphical_items.orbit import EllipticalOrbitItem
+    return _paint(EllipticalOrbitItem(0.36, 8.45 * SCALE))
+
+
+@benchmark(number=100, qt=True)
+def paint_sun():
+    from explorer.graphical_items.orbit import EllipticalOrbitItem
+    return _paint(EllipticalOrbitItem(0.36, 8.45 * SCALE).sun)
+
+
+@benchmark(number=100, qt=True)
+def paint_archimedean_spiral():
+    from explorer.graphical_items.spirals import ArchimedeanSpiral
+    return _paint(ArchimedeanSpiral(2.48 * SCALE, 15))
+
+
+@benchmark(number=100, qt=True)
+def paint_logarithmic_spiral():
+    from explorer.graphical_items.spirals import LogarithmicSpiral
+    return _paint(LogarithmicSpiral(0.218, 3 * SCALE, 0.7 * SCALE))
+
+
+@benchmark(number=500, qt=True)
+def explorer_run_tick():
+    from explorer.widget import ExplorerWidget
+
+    explorer = ExplorerWidget(PARAMETERS, SCALE, threaded=False)
+    explorer.start()
+    return explorer.run
+
+
+@benchmark(number=10, qt=True)
+def explorer_render_zoomed_frame():
+    from PyQt5.QtCore import QRectF
+    from PyQt5.QtGui import QImage, QPainter
+    from explorer.widget import ExplorerWidget
+
+    explorer = ExplorerWidget(PARAMETERS, SCALE, threaded=False)
+    image = QImage(800, 800, QImage.Format_ARGB32_Premultiplied)
+    # 100 times magnified, around a point on the orbit
+    source = QRectF(150, 50, 4, 4)
+
+    def render():
+        painter = QPainter(image)
+        explorer.scene.render(painter, QRectF(image.rect()), source)
+        painter.end()
+    return render
+
+
+@benchmark(number=10, qt=True)
+def explorer_render_frame():
+    from PyQt5.QtGui import QImage, QPainter
+    from explorer.widget import ExplorerWidget
+
+    explorer = ExplorerWidget(PARAMETERS, SCALE, threaded=False)
+    image = QImage(800, 800, QImage.Format_ARGB32_Premultiplied)
+
+    def render():
+        painter = QPainter(image)
+        explorer.scene.render(painter)
+        painter.end()
+    return render
+
+
+@benchmark(number=10, qt=True)
+def explorer_update_log_spirals():
+    # alpha edited at 3 000 mln. years, alternating between two values
+    from explorer.widget import ExplorerWidget
+
+    parameters = json.loads(json.dumps(PARAMETERS))
+    explorer = ExplorerWidget(parameters, SCALE, threaded=False)
+    explorer.seek(3000)
+    values = iter([0.25, 0.218] * 1000)
+
+    def update():
+        parameters['log_spirals']['alpha']['value'] = next(values)
+        explorer.update_parameters(parameters)
+    return update
+
+
+@benchmark(number=1, repeat=3, qt=True)
+def intersections_update_10k_ticks():
+    # 5 000 mln. years fed one tick at a time
+    from explorer.engine import SimulationEngine, timeline
+    from explorer.intersections_manager import IntersectionsManager
+
+    engine = SimulationEngine(PARAMETERS)
+    result = engine.evaluate(timeline(0, 5000, 0.5)[:10000])
+    manager = IntersectionsManager(PARAMETERS, engine)
+
+    def update():
+        manager.restart()
+        for i in range(len(result)):
+            manager.update(result.time[i],
+                           result.sun_distance[i],
+                           result.sun_galactic_rotation[i])
+    return update
+
+
+@benchmark(number=1, repeat=3, qt=True)
+def intersections_update_batch_1e6_myr():
+    from explorer.engine import SimulationEngine, timeline
+    from explorer.intersections_manager import IntersectionsManager
+
+    engine = SimulationEngine(PARAMETERS)
+    result = engine.evaluate(timeline(0, 1000000, 0.5))
+    manager = IntersectionsManager(PARAMETERS, engine)
+
+    def update():
+        manager.restart()
+        manager.update_batch(result.time,
+                             result.sun_distance,
+                             result.sun_galactic_rotation)
+    return update
+
+
+@benchmark(number=1, repeat=5)
+def engine_run_1e5_myr():
+    from explorer.engine import SimulationEngine
+
+    engine = SimulationEngine(PARAMETERS)
+    return lambda: engine.run(0, 100000, 0.5)
+
+
+@benchmark(number=1, repeat=5)
+def adaptive_run_1e5_myr():
+    from explorer.engine import SimulationEngine
+    from explorer.adaptive import AdaptiveStepper
+
+    stepper = AdaptiveStepper(SimulationEngine(PARAMETERS))
+    return lambda: stepper.run(0, 100000)
+
+
+@benchmark(number=1, repeat=3)
+def engine_stream_1e5_myr():
+    # 200 000 samples in chunks of 10 000, only one chunk alive at a time
+    from explorer.engine import SimulationEngine
+
+    engine = SimulationEngine(PARAMETERS)
+
+    def stream():
+        for chunk in engine.stream(0, 100000, 0.5, chunk_size=10000):
+            pass
+    return stream
+
+
+@benchmark(number=10, repeat=5)
+def cached_run_2e4_myr():
+    import tempfile
+    from explorer.engine import SimulationEngine
+    from explorer.cache import ResultCache
+
+    engine = SimulationEngine(PARAMETERS, cache=ResultCache(tempfile.mkdtemp()))
+    engine.run(0, 20000, 0.5)
+    return lambda: engine.run(0, 20000, 0.5)
+
+
+@benchmark(number=1, repeat=3)
+def population_run_1e4_stars():
+    from explorer.population import PopulationEngine, sample_population
+
+    engine = PopulationEngine(PARAMETERS, sample_population(PARAMETERS, 10000, seed=0))
+    return lambda: engine.run(0, 1000, 5)
+
+
+@benchmark(number=100, qt=True)
+def paint_population_1e4_stars():
+    from explorer.population import PopulationEngine, sample_population
+    from explorer.graphical_items.population import StarsItem
+
+    engine = PopulationEngine(PARAMETERS, sample_population(PARAMETERS, 10000, seed=0))
+    x, y = engine.positions(500)
+    stars = StarsItem()
+    stars.set_positions(x * SCALE, -y * SCALE)
+    return _paint(stars)
+
+
+def run(names=None):
+    results = {}
+    for name, (setup, number, repeat, qt) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        if qt:
+            application()
+
+        try:
+            timings = measure(setup(), number, repeat)
+        except Exception as error:
+            # recorded, the other benchmarks still run
+            results[name] = {'error': '{}: {}'.format(type(error).__name__, error)}
+            print('{:<36} {:>15}'.format(name, 'FAILED'), file=sys.stderr)
+            traceback.print_exc()
+            continue
+
+        results[name] = {
+            'best': min(timings),
+            'mean': sum(timings) / len(timings),
+            'number': number,
+            'repeat': repeat,
+        }
+        print('{:<36} {:>12.3f} us'.format(name, min(timings) * 1e6), file=sys.stderr)
+    return results
+
+
+def failures(results: dict):
+    return [name for name, result in results.items() if 'error' in result]
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    # names of the benchmarks slower than baseline by more than threshold
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or 'error' in result or 'error' in baseline[name]:
+            continue
+        ratio = result['best'] / baseline[name]['best']
+        mark = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = 'REGRESSION'
+        print('{:<36} {:>8.2f}x {}'.format(name, ratio, mark), file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                     description='Benchmarks of the galaxy model')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--output', help='json file for the results, stdout by default')
+    parser.add_argument('--baseline', help='json results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown against the baseline, 0.1 is 10%%')
+    parser.add_argument('--list', action='store_true', help='list benchmarks and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'benchmarks': run(args.names),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    status = 1 if failures(report['benchmarks']) else 0
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['benchmarks']
+        if compare(report['benchmarks'], baseline, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
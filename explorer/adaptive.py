@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+
+from .crossings import CrossingsDetector
+
+
+class AdaptiveStepper:
+
+    def __init__(self,
+                 engine,
+                 tolerance: float = 1e-6,
+                 min_step: float = 0.01,
+                 max_step: float = 10,
+                 safety: float = 0.5):
+
+        self.engine = engine
+        # error on the crossing epochs, mln. years
+        self.tolerance = tolerance
+        # mln. years
+        self.min_step = min_step
+        self.max_step = max_step
+        # fraction of the margin to an event that the step error may take
+        self.safety = safety
+
+        self.detector = CrossingsDetector(engine, tolerance)
+
+    @property
+    def config(self):
+        return self.engine.config
+
+    def events(self, time):
+        # (values, fronts): the continuous functions whose zeros are events,
+        # one row each, kpk. These are the sun's offsets from the four
+        # logarithmic arms and from the edges of their bands, and its
+        # position among the archimedean arm fronts, whose events are where
+        # the integer front number of the last row changes
+        result = self.engine.evaluate(time)
+        radii = self.engine.log_spirals_radii(result.time, result.sun_galactic_rotation)
+
+        half_width = self.config.log_spirals.width / 2
+        arch_spirals = self.config.arch_spirals
+        # fronts are spacing apart in units of V0
+        fronts = ((result.sun_distance / arch_spirals.V0 + result.time -
+                   arch_spirals.FRONT_START) / arch_spirals.spacing)
+        arch_scale = arch_spirals.V0 * arch_spirals.spacing
+
+        offsets = result.sun_distance - radii
+        values = np.vstack((offsets, offsets - half_width, offsets + half_width,
+                            arch_scale * fronts))
+        return values, fronts
+
+    def _accepted(self, step, left, right, middle, left_fronts, right_fronts):
+        # a step is accepted when the deviation of the middle sample from
+        # the chord, the error of a linear model of the events, stays below
+        # a fraction of the margin of every event: within a step of the same
+        # sign the nearest endpoint value, so that no pair of events can hide
+        # between the samples, across a sign change half the chord, so that
+        # there is a single event for the root refinement. Steps over an
+        # event must also place it within the tolerance by the chord, so
+        # they shrink as the sun approaches an arm
+        error = np.abs(middle - (left + right) / 2)
+
+        same = np.sign(left[:-1]) == np.sign(right[:-1])
+        margin = np.where(same, np.minimum(np.abs(left[:-1]), np.abs(right[:-1])),
+                          np.abs(right[:-1] - left[:-1]) / 2)
+
+        # the arch row is measured against the walls of its front cell
+        front = np.floor(left_fronts)
+        arch_scale = self.config.arch_spirals.V0 * self.config.arch_spirals.spacing
+        arch_margin = np.where(front == np.floor(right_fronts),
+                               arch_scale * np.minimum.reduce([left_fronts - front,
+                                                               front + 1 - left_fronts,
+                                                               right_fronts - front,
+                                                               front + 1 - right_fronts]),
+                               np.abs(right[-1] - left[-1]) / 2)
+        margin = np.vstack((margin, arch_margin))
+
+        # error on the event time, the error over the slope of the chord
+        crossing = ~np.vstack((same, front == np.floor(right_fronts)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            time_error = np.where(crossing, error * step / np.abs(right - left), 0)
+
+        return (np.all(error <= self.safety * margin, axis=0) &
+                np.all(time_error <= self.tolerance, axis=0))
+
+    def timeline(self, t_start: float = 0, t_end: float = 1000):
+        # samples max_step apart, every step that is rejected is halved
+        # until it is accepted or min_step long; each level of the
+        # refinement is evaluated as one batch
+        count = max(int(math.ceil((t_end - t_start) / self.max_step)), 1)
+        times = [np.linspace(t_start, t_end, count + 1)]
+        values, fronts = self.events(times[0])
+
+        left, right = times[0][:-1], times[0][1:]
+        left_values, right_values = values[:, :-1], values[:, 1:]
+        left_fronts, right_fronts = fronts[:-1], fronts[1:]
+
+        while len(left):
+            middle = (left + right) / 2
+            middle_values, middle_fronts = self.events(middle)
+
+            rejected = ~self._accepted(right - left, left_values, right_values,
+                                       middle_values, left_fronts, right_fronts)
+            # halves would be shorter than min_step
+            rejected &= right - left >= 2 * self.min_step
+
+            middle, middle_values, middle_fronts = (middle[rejected],
+                                                    middle_values[:, rejected],
+                                                    middle_fronts[rejected])
+            times.append(middle)
+
+            left = np.concatenate((left[rejected], middle))
+            right = np.concatenate((middle, right[rejected]))
+            left_values = np.hstack((left_values[:, rejected], middle_values))
+            right_values = np.hstack((middle_values, right_values[:, rejected]))
+            left_fronts = np.concatenate((left_fronts[rejected], middle_fronts))
+            right_fronts = np.concatenate((middle_fronts, right_fronts[rejected]))
+
+        return np.sort(np.concatenate(times))
+
+    def run(self, t_start: float = 0, t_end: float = 1000):
+        # SimulationEngine.run on the adaptive timeline
+        result = self.engine.evaluate(self.timeline(t_start, t_end))
+
+        detector = self.detector
+        result.arch_crossings = detector.arch_crossings(result.time, result.sun_distance)
+        result.log_crossings = detector.log_crossings(result.time,
+                                                      result.sun_distance,
+                                                      result.sun_galactic_rotation)
+        result.log_band_crossings, result.log_band_visits = detector.log_band_visits(
+            result.time, result.sun_distance, result.sun_galactic_rotation)
+        result.log_spirals_radii = self.engine.log_spirals_radii(result.time,
+                                                                 result.sun_galactic_rotation)
+        return result
@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import tempfile
+import contextlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+from .engine import SimulationResult
+from .crossings import BandVisits, Crossings
+from .export import CROSSINGS_COLUMNS, CROSSINGS_FAMILIES, TRAJECTORY_COLUMNS, VISITS_COLUMNS
+
+
+# bumped whenever the stored arrays or the results themselves change
+VERSION = 1
+
+
+def config_values(config):
+    # the numbers of a ModelConfig that a run depends on, by group
+    values = {}
+    for group in ('orbit', 'log_spirals', 'arch_spirals'):
+        group_config = getattr(config, group)
+        values[group] = {name: getattr(group_config, name)
+                         for name in group_config.__slots__
+                         if isinstance(getattr(group_config, name), float)}
+    return values
+
+
+def result_key(config, t_start: float, t_end: float, step: float, tolerance: float):
+    # sha256 of the canonical json of everything that defines a run
+    canonical = json.dumps({'version': VERSION,
+                            'parameters': config_values(config),
+                            'timeline': [float(t_start), float(t_end), float(step)],
+                            'tolerance': float(tolerance)},
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def result_arrays(result):
+    arrays = {name: getattr(result, name) for name in TRAJECTORY_COLUMNS}
+    for family in CROSSINGS_FAMILIES:
+        crossings = getattr(result, family)
+        for name, dtype in CROSSINGS_COLUMNS:
+            arrays['{}.{}'.format(family, name)] = getattr(crossings, name)
+
+    visits = result.log_band_visits
+    for name, dtype in VISITS_COLUMNS:
+        arrays['log_band_visits.{}'.format(name)] = getattr(visits, name)
+    arrays['log_spirals_radii'] = result.log_spirals_radii
+    return arrays
+
+
+def arrays_result(arrays):
+    result = SimulationResult(*(arrays[name] for name in TRAJECTORY_COLUMNS))
+    for family in CROSSINGS_FAMILIES:
+        setattr(result, family, Crossings(*(arrays['{}.{}'.format(family, name)]
+                                            for name, dtype in CROSSINGS_COLUMNS)))
+
+    result.log_band_visits = BandVisits(*(arrays['log_band_visits.{}'.format(name)]
+                                          for name, dtype in VISITS_COLUMNS))
+    result.log_spirals_radii = arrays['log_spirals_radii']
+    return result
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    # exclusive lock between processes, held while the block runs
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ResultCache:
+
+    SUFFIX = '.npz'
+
+    def __init__(self, path: str, max_bytes: int = 2 ** 30):
+        # entries are path/<key>.npz, the modification time of an entry is
+        # the time of its last use
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+        self._lock_path = os.path.join(path, '.lock')
+
+    def _entry(self, key: str):
+        return os.path.join(self.path, key + self.SUFFIX)
+
+    def get(self, key: str):
+        # SimulationResult or None; entries appear by an atomic rename, so
+        # they are read without the lock
+        path = self._entry(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            # missing, evicted meanwhile or unreadable
+            return None
+        return arrays_result(arrays)
+
+    def put(self, key: str, result):
+        # written aside and renamed into place, then the least recently
+        # used entries are evicted down to max_bytes
+        handle, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                np.savez(f, **result_arrays(result))
+            with file_lock(self._lock_path):
+                os.replace(temporary, self._entry(key))
+                self._evict()
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+            raise
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(self.SUFFIX):
+                with contextlib.suppress(OSError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total -= size
+
+    @property
+    def nbytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.path)
+                   if entry.name.endswith(self.SUFFIX))
+
+    def clear(self):
+        with file_lock(self._lock_path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(self.SUFFIX):
+                    with contextlib.suppress(OSError):
+                        os.remove(entry.path)
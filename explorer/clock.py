@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class SimulationClock:
+
+    def __init__(self,
+                 time_interval: float = 0.5,
+                 speed: float = 1,
+                 frame_rate: int = 60,
+                 max_steps: int = 1000000):
+
+        # physics substep, mln. years
+        self.time_interval = time_interval
+        # substeps per frame, 1 reproduces one time_interval per frame
+        self.speed = speed
+        self.frame_rate = frame_rate
+        # upper bound on substeps per advance, beyond it the simulation
+        # falls behind the wall clock instead of piling up work
+        self.max_steps = max_steps
+
+        self.reset()
+
+    @property
+    def time(self):
+        # time of the next substep, from the integer step index so that
+        # long runs do not accumulate rounding errors
+        return self.step * self.time_interval
+
+    def reset(self, time: float = 0):
+        self.step = int(round(time / self.time_interval))
+        self._remainder = 0.0
+
+    def advance(self, wall_time: float):
+        return self.advance_frames(wall_time * self.frame_rate)
+
+    def advance_frames(self, frames: float = 1):
+        steps = frames * self.speed + self._remainder
+        count = int(steps)
+        self._remainder = steps - count
+
+        if count > self.max_steps:
+            count, self._remainder = self.max_steps, 0.0
+
+        times = (self.step + np.arange(count)) * self.time_interval
+        self.step += count
+        return times
@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def _value(parameters: dict, group: str, name: str, errors: list):
+    try:
+        value = parameters[group][name]['value']
+    except (KeyError, TypeError):
+        errors.append('{}.{}: missing'.format(group, name))
+        return math.nan
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append('{}.{}: {!r} is not a number'.format(group, name, value))
+        return math.nan
+    if not math.isfinite(value):
+        errors.append('{}.{}: {!r} is not finite'.format(group, name, value))
+    return float(value)
+
+
+# conditions on the values as (condition, message); they are written
+# with & so that they also hold elementwise for arrays of sampled values
+CONSTRAINTS = {
+    'orbit.s_major_axis': (lambda value: value > 0, 'must be positive'),
+    'orbit.eccentricity': (lambda value: (value >= 0) & (value < 1), 'must be in [0, 1)'),
+    'orbit.orbit_period': (lambda value: value != 0, 'must not be zero'),
+    'orbit.sun_period': (lambda value: value > 0, 'must be positive'),
+    'log_spirals.r0': (lambda value: value > 0, 'must be positive'),
+    'log_spirals.period': (lambda value: value != 0, 'must not be zero'),
+    'log_spirals.width': (lambda value: value >= 0, 'must not be negative'),
+    'arch_spirals.V0': (lambda value: value > 0, 'must be positive'),
+    'arch_spirals.period': (lambda value: value > 0, 'must be positive'),
+}
+
+
+def _check(key: str, value: float, errors: list):
+    # missing or malformed values are already reported by _value
+    condition, message = CONSTRAINTS[key]
+    if not math.isnan(value) and not condition(value):
+        errors.append('{}: {}'.format(key, message))
+
+
+class OrbitConfig:
+
+    __slots__ = ('s_major_axis', 'eccentricity', 'orbit_period', 'sun_period',
+                 'orbit_rotation', 'sun_rotation',
+                 's_minor_axis', 'orbit_rotation_radians', 'sun_rotation_radians')
+
+    def __init__(self, parameters: dict, errors: list):
+        self.s_major_axis = _value(parameters, 'orbit', 's_major_axis', errors)
+        self.eccentricity = _value(parameters, 'orbit', 'eccentricity', errors)
+        self.orbit_period = _value(parameters, 'orbit', 'orbit_period', errors)
+        self.sun_period = _value(parameters, 'orbit', 'sun_period', errors)
+        # degrees
+        self.orbit_rotation = _value(parameters, 'orbit', 'orbit_rotation', errors)
+        self.sun_rotation = _value(parameters, 'orbit', 'sun_rotation', errors)
+
+        _check('orbit.s_major_axis', self.s_major_axis, errors)
+        _check('orbit.eccentricity', self.eccentricity, errors)
+        _check('orbit.orbit_period', self.orbit_period, errors)
+        _check('orbit.sun_period', self.sun_period, errors)
+
+        self.s_minor_axis = self.s_major_axis * math.sqrt(max(1 - self.eccentricity ** 2, 0))
+        self.orbit_rotation_radians = math.radians(self.orbit_rotation)
+        self.sun_rotation_radians = math.radians(self.sun_rotation)
+
+
+class LogSpiralsConfig:
+
+    # angular offsets of the four arms, degrees
+    OFFSETS = (-90, -180, 0, 90)
+
+    __slots__ = ('alpha', 'r0', 'period', 'rotation', 'width',
+                 'rotation_radians', 'omega', 'phase', 'alpha_per_degree', 'offsets')
+
+    def __init__(self, parameters: dict, errors: list):
+        self.alpha = _value(parameters, 'log_spirals', 'alpha', errors)
+        self.r0 = _value(parameters, 'log_spirals', 'r0', errors)
+        self.period = _value(parameters, 'log_spirals', 'period', errors)
+        # degrees
+        self.rotation = _value(parameters, 'log_spirals', 'rotation', errors)
+        self.width = _value(parameters, 'log_spirals', 'width', errors)
+
+        _check('log_spirals.r0', self.r0, errors)
+        _check('log_spirals.period', self.period, errors)
+        _check('log_spirals.width', self.width, errors)
+
+        self.rotation_radians = math.radians(self.rotation)
+        # degrees per mln. years
+        self.omega = 360 / self.period if self.period else math.nan
+        # the arm radius at the sun is
+        #     r0 * exp(alpha_per_degree * (sun_rotation - omega * time + phase + offset))
+        self.phase = self.rotation + 360
+        # alpha is per radian of the phase, which is in degrees here
+        self.alpha_per_degree = math.radians(self.alpha)
+        self.offsets = np.asarray(self.OFFSETS, dtype=float)[:, np.newaxis]
+
+
+class ArchSpiralsConfig:
+
+    # position of the first arm front at t = 0 in units of V0
+    FRONT_START = 28
+
+    __slots__ = ('ro', 'V0', 'period', 'rotation', 'rotation_radians', 'spacing')
+
+    def __init__(self, parameters: dict, errors: list):
+        self.ro = _value(parameters, 'arch_spirals', 'ro', errors)
+        self.V0 = _value(parameters, 'arch_spirals', 'V0', errors)
+        self.period = _value(parameters, 'arch_spirals', 'period', errors)
+        # degrees
+        self.rotation = _value(parameters, 'arch_spirals', 'rotation', errors)
+
+        _check('arch_spirals.V0', self.V0, errors)
+        _check('arch_spirals.period', self.period, errors)
+
+        self.rotation_radians = math.radians(self.rotation)
+        # time between two successive arm fronts, mln. years
+        self.spacing = self.period / 2
+
+
+class ModelConfig:
+
+    __slots__ = ('parameters', 'orbit', 'log_spirals', 'arch_spirals')
+
+    def __init__(self, parameters: dict):
+        if not isinstance(parameters, dict):
+            raise ConfigError('parameters must be a dict, got {}'.format(type(parameters).__name__))
+
+        errors = []
+        self.parameters = parameters
+        self.orbit = OrbitConfig(parameters, errors)
+        self.log_spirals = LogSpiralsConfig(parameters, errors)
+        self.arch_spirals = ArchSpiralsConfig(parameters, errors)
+
+        if errors:
+            raise ConfigError('Invalid parameters:\n' + '\n'.join(errors))
+
+
+def compile_parameters(parameters):
+    # ModelConfig of a parameters dict, a ModelConfig is returned as is
+    if isinstance(parameters, ModelConfig):
+        return parameters
+    return ModelConfig(parameters)
+
+
+def changed_groups(config, new_config):
+    # names of the groups whose values differ between two ModelConfigs
+    changed = set()
+    for group in ('orbit', 'log_spirals', 'arch_spirals'):
+        old, new = getattr(config, group), getattr(new_config, group)
+        if any(not np.array_equal(getattr(old, name), getattr(new, name))
+               for name in old.__slots__):
+            changed.add(group)
+    return changed
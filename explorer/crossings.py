@@ -0,0 +1,255 @@
+import math
+
+import numpy as np
+
+
+class Crossings:
+
+    def __init__(self, time, arm, distance, direction):
+        self.time = time
+        # index of the arm: arm front number k for the archimedean spirals,
+        # 0..3 for the logarithmic ones
+        self.arm = arm
+        self.distance = distance
+        # +1 when the sun ends up outside the arm, -1 when inside
+        self.direction = direction
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), np.empty(0, dtype=int),
+                   np.empty(0), np.empty(0, dtype=int))
+
+
+class BandVisits:
+
+    def __init__(self, arm, entry, exit):
+        self.arm = arm
+        # mln. years, nan when the sun is already inside the arm at the
+        # start of the timeline or still inside at its end
+        self.entry = entry
+        self.exit = exit
+        self.duration = exit - entry
+
+    def __len__(self):
+        return len(self.arm)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=int), np.empty(0), np.empty(0))
+
+
+def sign_changes(values):
+    # (rows, i) for every sample interval [i, i + 1] where a row changes sign
+    positive = np.atleast_2d(values) >= 0
+    return np.nonzero(positive[:, 1:] != positive[:, :-1])
+
+
+def find_roots(func, arm, left, right, tolerance: float, max_iterations: int = 100):
+    # vectorized Illinois (modified regula falsi) on brackets [left, right]
+    # of func(index, arm, time), where index are the positions of the
+    # brackets evaluated and arm = arm[index]; the bracket is kept, so it never diverges, and it
+    # converges superlinearly instead of the one bit per step of bisection.
+    # Every bracket is frozen once its own estimate moves by less than
+    # tolerance, so a root does not depend on the other brackets of the
+    # batch and func is only evaluated on the unconverged ones, so any other
+    # per-bracket data of func must be taken at index
+    a = np.array(left, dtype=float)
+    b = np.array(right, dtype=float)
+    arm = np.asarray(arm)
+    if not a.size:
+        return a
+
+    every = np.arange(a.size)
+    fa = func(every, arm, a)
+    fb = func(every, arm, b)
+    root = (a + b) / 2
+    side = np.zeros(a.shape, dtype=int)
+    active = every
+
+    for i in range(max_iterations):
+        a_, b_, fa_, fb_ = a[active], b[active], fa[active], fb[active]
+
+        denominator = fb_ - fa_
+        safe = np.where(denominator != 0, denominator, 1)
+        c = np.where(denominator != 0, b_ - fb_ * (b_ - a_) / safe, (a_ + b_) / 2)
+        c = np.clip(c, np.minimum(a_, b_), np.maximum(a_, b_))
+        fc = func(active, arm[active], c)
+
+        converged = (np.abs(c - root[active]) < tolerance) | (np.abs(b_ - a_) < tolerance)
+        root[active] = c
+
+        # the root is in [c, b] when f(c) has the sign of f(a)
+        right_part = (fc >= 0) == (fa_ >= 0)
+        previous_side = side[active]
+
+        a[active] = np.where(right_part, c, a_)
+        b[active] = np.where(right_part, b_, c)
+        fa[active] = np.where(right_part, fc, fa_)
+        fb[active] = np.where(right_part, fb_, fc)
+
+        # an endpoint kept twice in a row has its value halved
+        fb[active] = np.where(right_part & (previous_side == 1), fb[active] / 2, fb[active])
+        fa[active] = np.where(~right_part & (previous_side == -1), fa[active] / 2, fa[active])
+        side[active] = np.where(right_part, 1, -1)
+
+        active = active[~converged]
+        if not active.size:
+            break
+
+    return root
+
+
+class CrossingsDetector:
+
+    def __init__(self, engine, tolerance: float = 1e-6):
+        self.engine = engine
+        self.tolerance = tolerance
+
+    @property
+    def config(self):
+        return self.engine.config
+
+    def sun_distance(self, time):
+        return self.engine.sun_controller.evaluate(time)[0]
+
+    def arch_crossings(self, time, sun_distance=None):
+        # the k-th arm front moves inwards as V0 * (28 + period / 2 * k - time),
+        # so it meets the sun where sun_distance + V0 * time crosses
+        # V0 * (28 + period / 2 * k)
+        time = np.asarray(time, dtype=float)
+        if len(time) < 2:
+            return Crossings.empty()
+        if sun_distance is None:
+            sun_distance = self.sun_distance(time)
+
+        arch_spirals = self.config.arch_spirals
+        V0, spacing = arch_spirals.V0, arch_spirals.spacing
+        start = arch_spirals.FRONT_START
+
+        excess = sun_distance + V0 * time
+        low = np.minimum(excess[:-1], excess[1:])
+        high = np.maximum(excess[:-1], excess[1:])
+
+        # arms with V0 * (28 + spacing * k) in (low, high]
+        first = np.floor((low / V0 - start) / spacing).astype(int) + 1
+        last = np.floor((high / V0 - start) / spacing).astype(int)
+        first = np.maximum(first, 0)
+        counts = np.maximum(last - first + 1, 0)
+
+        indexes = np.repeat(np.arange(len(low)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        arm = first[indexes] + offsets
+
+        def func(index, arm, t):
+            return self.sun_distance(t) - V0 * (start + spacing * arm - t)
+
+        return self._refine(func, arm, time[indexes], time[indexes + 1])
+
+    def log_crossings(self, time, sun_distance=None, sun_galactic_rotation=None):
+        time = np.asarray(time, dtype=float)
+        if len(time) < 2:
+            return Crossings.empty()
+        if sun_distance is None or sun_galactic_rotation is None:
+            result = self.engine.evaluate(time)
+            sun_distance = result.sun_distance
+            sun_galactic_rotation = result.sun_galactic_rotation
+
+        radii = self.engine.log_spirals_radii(time, sun_galactic_rotation)
+        arm, indexes = sign_changes(sun_distance - radii)
+
+        def func(index, arm, t):
+            result = self.engine.evaluate(t)
+            radii = self.engine.log_spirals_radii(t, result.sun_galactic_rotation)
+            return result.sun_distance - radii[arm, np.arange(len(t))]
+
+        return self._refine(func, arm, time[indexes], time[indexes + 1])
+
+    def log_band_crossings(self, time, sun_distance=None, sun_galactic_rotation=None):
+        # crossings of the edges of the arms drawn width / 2 off the arm on
+        # both sides; direction is -1 when the sun enters the band of the
+        # arm and +1 when it leaves it
+        time = np.asarray(time, dtype=float)
+        if len(time) < 2:
+            return Crossings.empty()
+        if sun_distance is None or sun_galactic_rotation is None:
+            result = self.engine.evaluate(time)
+            sun_distance = result.sun_distance
+            sun_galactic_rotation = result.sun_galactic_rotation
+
+        arms = len(self.config.log_spirals.OFFSETS)
+        # rows 0..3 are the outer edges of the arms, rows 4..7 the inner ones
+        half_width = self.config.log_spirals.width / 2
+        edges = np.repeat([half_width, -half_width], arms)[:, np.newaxis]
+
+        radii = self.engine.log_spirals_radii(time, sun_galactic_rotation)
+        row, indexes = sign_changes(sun_distance - np.tile(radii, (2, 1)) - edges)
+
+        def func(index, row, t):
+            result = self.engine.evaluate(t)
+            radii = self.engine.log_spirals_radii(t, result.sun_galactic_rotation)
+            return result.sun_distance - radii[row % arms, np.arange(len(t))] - edges[row, 0]
+
+        crossings = self._refine(func, row, time[indexes], time[indexes + 1])
+
+        # beyond the outer edge or inside the inner one is outside the band
+        outer = crossings.arm < arms
+        crossings.direction = np.where(outer, crossings.direction, -crossings.direction)
+        crossings.arm = crossings.arm % arms
+        return crossings
+
+    def log_band_visits(self, time, sun_distance=None, sun_galactic_rotation=None):
+        # (log_band_crossings, BandVisits): entry, exit and residence time
+        # of every stay of the sun inside the band of an arm
+        time = np.asarray(time, dtype=float)
+        if not len(time):
+            return Crossings.empty(), BandVisits.empty()
+        if sun_distance is None or sun_galactic_rotation is None:
+            result = self.engine.evaluate(time)
+            sun_distance = result.sun_distance
+            sun_galactic_rotation = result.sun_galactic_rotation
+
+        crossings = self.log_band_crossings(time, sun_distance, sun_galactic_rotation)
+
+        arms = len(self.config.log_spirals.OFFSETS)
+        radii = self.engine.log_spirals_radii(time[:1], sun_galactic_rotation[:1])[:, 0]
+        inside_start = np.abs(sun_distance[0] - radii) < self.config.log_spirals.width / 2
+        # every crossing toggles the state of its arm
+        toggles = np.bincount(crossings.arm, minlength=arms) % 2 == 1
+        inside_end = inside_start ^ toggles
+
+        # an open stay at either end of the timeline gets a nan bound, the
+        # events of each arm then alternate entry, exit
+        start_arms = np.flatnonzero(inside_start)
+        end_arms = np.flatnonzero(inside_end)
+        arm = np.concatenate((start_arms, crossings.arm, end_arms))
+        event_time = np.concatenate((np.full(len(start_arms), np.nan),
+                                     crossings.time,
+                                     np.full(len(end_arms), np.nan)))
+        rank = np.concatenate((np.zeros(len(start_arms)),
+                               np.ones(len(crossings)),
+                               np.full(len(end_arms), 2)))
+
+        order = np.lexsort((event_time, rank, arm))
+        arm, event_time = arm[order], event_time[order]
+
+        visits = BandVisits(arm[0::2], event_time[0::2], event_time[1::2])
+        order = np.argsort(np.where(np.isnan(visits.entry), -np.inf, visits.entry),
+                           kind='stable')
+        return crossings, BandVisits(visits.arm[order], visits.entry[order], visits.exit[order])
+
+    def _refine(self, func, arm, left, right):
+        if not len(arm):
+            return Crossings.empty()
+
+        crossing_time = find_roots(func, arm, left, right, self.tolerance)
+
+        order = np.argsort(crossing_time, kind='stable')
+        crossing_time, arm = crossing_time[order], arm[order]
+
+        direction = np.where(func(order, arm, right[order]) >= 0, 1, -1)
+        distance = self.sun_distance(crossing_time)
+
+        return Crossings(crossing_time, arm, distance, direction)
@@ -0,0 +1,252 @@
+import math
+
+import numpy as np
+
+from .laws_motions import EllipticalKeplersMotion
+from .laws_motions import CircularMotion
+from .crossings import BandVisits, Crossings, CrossingsDetector
+from .config import LogSpiralsConfig, changed_groups, compile_parameters
+
+
+def timeline_length(t_start: float, t_end: float, step: float):
+    count = int(math.floor((t_end - t_start) / step + 1e-9)) + 1
+    return max(count, 0)
+
+
+def timeline(t_start: float, t_end: float, step: float):
+    return t_start + step * np.arange(timeline_length(t_start, t_end, step))
+
+
+class SimulationResult:
+
+    def __init__(self,
+                 time,
+                 sun_distance,
+                 sun_rotation,
+                 sun_galactic_rotation,
+                 orbit_rotation,
+                 arch_rotation,
+                 log_rotation):
+
+        self.time = time
+        self.sun_distance = sun_distance
+        # radians, true anomaly of the sun on its orbit
+        self.sun_rotation = sun_rotation
+        # degrees, position angle compared against the arms
+        self.sun_galactic_rotation = sun_galactic_rotation
+        # radians
+        self.orbit_rotation = orbit_rotation
+        self.arch_rotation = arch_rotation
+        self.log_rotation = log_rotation
+
+        self.arch_crossings = Crossings.empty()
+        self.log_crossings = Crossings.empty()
+        # edges of the arm bands, width wide, and the stays inside them
+        self.log_band_crossings = Crossings.empty()
+        self.log_band_visits = BandVisits.empty()
+        self.log_spirals_radii = np.empty((len(LogSpiralsConfig.OFFSETS), 0))
+        # x, y of the population stars at the last time, kpk, when there is one
+        self.star_positions = None
+
+    def __len__(self):
+        return len(self.time)
+
+
+class SimulationEngine:
+
+    # shortest horizon of the cached table, it grows by doubling so that the
+    # same horizons come back and hit the result cache
+    TABLE_HORIZON = 1000
+
+    def __init__(self, parameters, tolerance: float = 1e-6, cache=None):
+        # parameters dict or an already compiled ModelConfig
+        self.config = compile_parameters(parameters)
+        self.parameters = self.config.parameters
+        self.settings_controllers()
+
+        self.detector = CrossingsDetector(self, tolerance)
+        # ResultCache shared with other engines and processes, or None
+        self.cache = cache
+
+        self._table = None
+        self._table_step = None
+
+    def settings_controllers(self):
+        self._settings_orbit()
+        self._settings_arch_spirals()
+        self._settings_log_spirals()
+
+    def _settings_orbit(self):
+        orbit = self.config.orbit
+        self.sun_controller = EllipticalKeplersMotion(orbit.sun_period,
+                                                      orbit.s_major_axis,
+                                                      orbit.eccentricity,
+                                                      orbit.sun_rotation_radians)
+
+        self.orbit_controller = CircularMotion(orbit.orbit_period,
+                                               orbit.orbit_rotation_radians)
+
+    def _settings_arch_spirals(self):
+        arch_spirals = self.config.arch_spirals
+        self.arch_spirals_controller = CircularMotion(arch_spirals.period,
+                                                      arch_spirals.rotation_radians)
+
+    def _settings_log_spirals(self):
+        log_spirals = self.config.log_spirals
+        self.log_spirals_controller = CircularMotion(log_spirals.period,
+                                                     log_spirals.rotation_radians)
+
+    def update_config(self, parameters):
+        # applies new parameters and returns the names of the changed
+        # groups; only their controllers are re-created and the cached
+        # table keeps every result that does not depend on them
+        config = compile_parameters(parameters)
+        changed = changed_groups(self.config, config)
+        self.config = config
+        self.parameters = config.parameters
+
+        if 'orbit' in changed:
+            # the sun trajectory and so every crossing depends on the orbit
+            self._settings_orbit()
+            self._table = None
+        if 'arch_spirals' in changed:
+            self._settings_arch_spirals()
+        if 'log_spirals' in changed:
+            self._settings_log_spirals()
+
+        if self._table is not None and changed:
+            # patched in memory only, the cache keeps complete runs
+            self._update_table(changed)
+        return changed
+
+    def _update_table(self, changed):
+        table = self._table
+        if 'arch_spirals' in changed:
+            table.arch_rotation = self.arch_spirals_controller.evaluate(table.time)
+            table.arch_crossings = self.detector.arch_crossings(table.time,
+                                                                table.sun_distance)
+        if 'log_spirals' in changed:
+            table.log_rotation = self.log_spirals_controller.evaluate(table.time)
+            table.log_crossings = self.detector.log_crossings(table.time,
+                                                              table.sun_distance,
+                                                              table.sun_galactic_rotation)
+            table.log_band_crossings, table.log_band_visits = self.detector.log_band_visits(
+                table.time, table.sun_distance, table.sun_galactic_rotation)
+            table.log_spirals_radii = self.log_spirals_radii(table.time,
+                                                             table.sun_galactic_rotation)
+
+    def sun_galactic_rotation(self, time: float):
+        sun_rotation = self.sun_controller.full_rotation(time)
+        orbit_rotation = self.orbit_controller.rotation(time)
+        return sun_rotation + math.degrees(orbit_rotation) - 90
+
+    def evaluate(self, times):
+        times = np.asarray(times, dtype=float)
+
+        sun_distance, sun_rotation, sun_full_rotation = self.sun_controller.evaluate(times)
+        orbit_rotation = self.orbit_controller.evaluate(times)
+        sun_galactic_rotation = sun_full_rotation + np.degrees(orbit_rotation) - 90
+
+        return SimulationResult(times,
+                                sun_distance,
+                                sun_rotation,
+                                sun_galactic_rotation,
+                                orbit_rotation,
+                                self.arch_spirals_controller.evaluate(times),
+                                self.log_spirals_controller.evaluate(times))
+
+    def run(self, t_start: float = 0, t_end: float = 1000, step: float = 0.5):
+        if self.cache is None:
+            return self._run(t_start, t_end, step)
+
+        key = self._key(t_start, t_end, step)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._run(t_start, t_end, step)
+            self.cache.put(key, result)
+        return result
+
+    def _key(self, t_start: float, t_end: float, step: float):
+        # the cache module imports this one
+        from .cache import result_key
+        return result_key(self.config, t_start, t_end, step, self.detector.tolerance)
+
+    def _run(self, t_start: float, t_end: float, step: float):
+        result = self.evaluate(timeline(t_start, t_end, step))
+
+        result.arch_crossings = self.detector.arch_crossings(result.time,
+                                                             result.sun_distance)
+        result.log_crossings = self.detector.log_crossings(result.time,
+                                                           result.sun_distance,
+                                                           result.sun_galactic_rotation)
+        result.log_band_crossings, result.log_band_visits = self.detector.log_band_visits(
+            result.time, result.sun_distance, result.sun_galactic_rotation)
+        result.log_spirals_radii = self.log_spirals_radii(result.time,
+                                                          result.sun_galactic_rotation)
+        return result
+
+    def stream(self,
+               t_start: float = 0,
+               t_end: float = 1000,
+               step: float = 0.5,
+               chunk_size: int = 100000):
+        # run() in SimulationResults of at most chunk_size samples, in
+        # memory that does not grow with the horizon. Times come from the
+        # integer sample index, the crossings of a chunk include those
+        # since the last sample of the previous one, and a band visit is
+        # reported once, in the chunk where it ends
+        count = timeline_length(t_start, t_end, step)
+        arms = len(LogSpiralsConfig.OFFSETS)
+        # entry times of the stays open at the end of the previous chunk
+        entries = np.full(arms, np.nan)
+        previous = None
+
+        for first in range(0, count, chunk_size):
+            index = np.arange(first, min(first + chunk_size, count))
+            result = self.evaluate(t_start + step * index)
+            result.log_spirals_radii = self.log_spirals_radii(result.time,
+                                                              result.sun_galactic_rotation)
+
+            samples = (result.time, result.sun_distance, result.sun_galactic_rotation)
+            if previous is not None:
+                samples = [np.concatenate(([value], values))
+                           for value, values in zip(previous, samples)]
+            previous = tuple(values[-1] for values in samples)
+
+            result.arch_crossings = self.detector.arch_crossings(*samples[:2])
+            result.log_crossings = self.detector.log_crossings(*samples)
+            result.log_band_crossings, visits = self.detector.log_band_visits(*samples)
+
+            # stays open at the start of the chunk began in an earlier one
+            entry = np.where(np.isnan(visits.entry), entries[visits.arm], visits.entry)
+            if index[-1] == count - 1:
+                result.log_band_visits = BandVisits(visits.arm, entry, visits.exit)
+            else:
+                closed = ~np.isnan(visits.exit)
+                entries[:] = np.nan
+                entries[visits.arm[~closed]] = entry[~closed]
+                result.log_band_visits = BandVisits(visits.arm[closed], entry[closed],
+                                                    visits.exit[closed])
+            yield result
+
+    def table(self, t_end: float, step: float = 0.5):
+        # run from t = 0, reused by every call up to its horizon and grown
+        # geometrically beyond it
+        table = self._table
+        if table is None or self._table_step != step or table.time[-1] < t_end:
+            horizon = self.TABLE_HORIZON
+            while horizon < t_end:
+                horizon *= 2
+
+            self._table = self.run(0, horizon, step)
+            self._table_step = step
+
+        return self._table
+
+    def log_spirals_radii(self, time, sun_galactic_rotation):
+        log_spirals = self.config.log_spirals
+
+        phase = sun_galactic_rotation - log_spirals.omega * time + log_spirals.phase
+        fi = phase[np.newaxis, :] + log_spirals.offsets
+
+        return log_spirals.r0 * np.exp(log_spirals.alpha_per_degree * fi)
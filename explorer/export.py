@@ -0,0 +1,198 @@
+import os
+import math
+import json
+import time
+import struct
+
+import numpy as np
+
+from .engine import SimulationResult
+from .crossings import BandVisits, Crossings
+
+
+FORMAT = 'galaxy-trajectory'
+# 2 adds the band crossings and visits
+VERSION = 2
+
+TRAJECTORY_COLUMNS = ('time',
+                      'sun_distance',
+                      'sun_rotation',
+                      'sun_galactic_rotation',
+                      'orbit_rotation',
+                      'arch_rotation',
+                      'log_rotation')
+
+CROSSINGS_COLUMNS = (('time', np.float64),
+                     ('arm', np.int64),
+                     ('distance', np.float64),
+                     ('direction', np.int8))
+
+CROSSINGS_FAMILIES = ('arch_crossings', 'log_crossings', 'log_band_crossings')
+
+VISITS_COLUMNS = (('arm', np.int64),
+                  ('entry', np.float64),
+                  ('exit', np.float64))
+
+# fixed .npy header size, so the shape can be rewritten in place
+HEADER_LENGTH = 128
+
+
+class ColumnWriter:
+
+    def __init__(self, path: str, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(
+            self.dtype.str, self.count)
+        # magic string, version and header length take 10 bytes, the
+        # header itself ends with a newline
+        header = header.ljust(HEADER_LENGTH - 11) + '\n'
+
+        self._file.seek(0)
+        self._file.write(b'\x93NUMPY\x01\x00')
+        self._file.write(struct.pack('<H', len(header)))
+        self._file.write(header.encode('latin1'))
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self._file.write(values.tobytes())
+        self.count += len(values)
+
+    def flush(self):
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class TrajectoryWriter:
+
+    def __init__(self, path: str, parameters: dict = None, flush_interval: float = 1):
+        # never into the files of another run
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.listdir(path):
+            raise FileExistsError('{} is not empty'.format(path))
+
+        # seconds between header updates, so that the files of an
+        # interrupted run still open
+        self.flush_interval = flush_interval
+        self._flushed = time.monotonic()
+
+        self.columns = {}
+        for name in TRAJECTORY_COLUMNS:
+            self.columns[name] = ColumnWriter(self._column_path(name), np.float64)
+        for family in CROSSINGS_FAMILIES:
+            for name, dtype in CROSSINGS_COLUMNS:
+                name = '{}_{}'.format(family, name)
+                self.columns[name] = ColumnWriter(self._column_path(name), dtype)
+        for name, dtype in VISITS_COLUMNS:
+            name = 'log_band_visits_{}'.format(name)
+            self.columns[name] = ColumnWriter(self._column_path(name), dtype)
+
+        header = {
+            'format': FORMAT,
+            'version': VERSION,
+            'parameters': parameters,
+            'columns': list(self.columns),
+        }
+        with open(os.path.join(path, 'header.json'), 'w') as f:
+            json.dump(header, f)
+
+    def _column_path(self, name: str):
+        return os.path.join(self.path, '{}.npy'.format(name))
+
+    def write(self, result):
+        for name in TRAJECTORY_COLUMNS:
+            self.columns[name].append(getattr(result, name))
+
+        for family in CROSSINGS_FAMILIES:
+            crossings = getattr(result, family)
+            for name, dtype in CROSSINGS_COLUMNS:
+                self.columns['{}_{}'.format(family, name)].append(getattr(crossings, name))
+
+        visits = result.log_band_visits
+        for name, dtype in VISITS_COLUMNS:
+            self.columns['log_band_visits_{}'.format(name)].append(getattr(visits, name))
+
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self._flushed = time.monotonic()
+
+    def close(self):
+        for column in self.columns.values():
+            column.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_trajectory(path: str, mmap_mode: str = 'r'):
+    with open(os.path.join(path, 'header.json'), 'r') as f:
+        header = json.load(f)
+    if header.get('format') != FORMAT:
+        raise ValueError('{} is not a trajectory directory'.format(path))
+
+    def load(name):
+        return np.load(os.path.join(path, '{}.npy'.format(name)), mmap_mode=mmap_mode)
+
+    result = SimulationResult(*(load(name) for name in TRAJECTORY_COLUMNS))
+    # the band columns are missing from version 1 directories and stay empty
+    columns = set(header['columns'])
+    for family in CROSSINGS_FAMILIES:
+        names = ['{}_{}'.format(family, name) for name, dtype in CROSSINGS_COLUMNS]
+        if columns.issuperset(names):
+            setattr(result, family, Crossings(*(load(name) for name in names)))
+
+    names = ['log_band_visits_{}'.format(name) for name, dtype in VISITS_COLUMNS]
+    if columns.issuperset(names):
+        result.log_band_visits = BandVisits(*(load(name) for name in names))
+
+    result.parameters = header['parameters']
+    return result
+
+
+def result_to_dict(result, parameters: dict = None, trajectory: bool = True):
+    # json-serializable form of a run, the trajectory columns may be left out
+    data = {
+        'format': FORMAT,
+        'version': VERSION,
+        'parameters': parameters,
+    }
+    if trajectory:
+        data['trajectory'] = {name: np.asarray(getattr(result, name)).tolist()
+                              for name in TRAJECTORY_COLUMNS}
+    for family in CROSSINGS_FAMILIES:
+        crossings = getattr(result, family)
+        data[family] = {name: np.asarray(getattr(crossings, name)).tolist()
+                        for name, dtype in CROSSINGS_COLUMNS}
+
+    visits = result.log_band_visits
+    data['log_band_visits'] = {name: _json_values(getattr(visits, name))
+                               for name in ('arm', 'entry', 'exit', 'duration')}
+    return data
+
+
+def _json_values(values):
+    # nan, for the open bounds of the visits, is written as null
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    return [None if math.isnan(value) else value for value in values.tolist()]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from PyQt5.QtWidgets import QGraphicsItem
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QColor, QPen, QPolygonF
+
+
+class StarsItem(QGraphicsItem):
+
+    def __init__(self,
+                 color: QColor = QColor(255, 140, 0),
+                 thickness: int = 2,
+                 *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+
+        self.pen = QPen()
+        self.pen.setWidth(thickness)
+        self.pen.setColor(color)
+        self.pen.setCapStyle(Qt.RoundCap)
+        self.pen.setCosmetic(True)
+
+        self.points = QPolygonF()
+        self._points = np.empty((0, 2))
+        self._rect = QRectF()
+
+        self.setPos(QPointF(0, 0))
+
+    def _resize(self, count: int):
+        # the polygon's storage is viewed as a (count, 2) float array so that
+        # all stars are written without a QPointF per star
+        self.points = QPolygonF()
+        if not count:
+            # data() of an empty polygon may be null
+            self._points = np.empty((0, 2))
+            return
+        self.points.fill(QPointF(), count)
+
+        pointer = self.points.data()
+        pointer.setsize(count * 2 * np.dtype(np.float64).itemsize)
+        self._points = np.frombuffer(pointer, dtype=np.float64).reshape(count, 2)
+
+    def set_positions(self, x, y):
+        # scene pixels, y pointing down
+        if len(x) != len(self._points):
+            self._resize(len(x))
+
+        self._points[:, 0] = x
+        self._points[:, 1] = y
+
+        if len(x):
+            radius = float(np.max(np.hypot(x, y))) + self.pen.widthF()
+        else:
+            radius = 0
+        rect = QRectF(-radius, -radius, 2 * radius, 2 * radius)
+        if rect != self._rect:
+            self.prepareGeometryChange()
+            self._rect = rect
+        self.update()
+
+    def clear(self):
+        if len(self._points):
+            self.set_positions((), ())
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, options, widget=None):
+        painter.setPen(self.pen)
+        painter.drawPoints(self.points)
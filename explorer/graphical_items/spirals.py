@@ -1,8 +1,100 @@
 import math
+from functools import lru_cache
+
+import numpy as np
 
 from PyQt5.QtWidgets import QGraphicsItem
 from PyQt5.QtCore import Qt, QPointF, QRectF
-from PyQt5.QtGui import QColor, QPen, QPainter, QPolygonF
+from PyQt5.QtGui import QColor, QPen, QPainter, QPolygonF, QPainterPath
+
+
+# largest distance between a curve and its polyline, device pixels
+TOLERANCE = 0.25
+# vertices are generated and cached in blocks of CHUNK
+CHUNK = 256
+MAX_POINTS = 100000
+
+
+def detail_level(lod: float):
+    # the view scale rounded up to a power of two, so that zooming reuses
+    # the cached paths until the scale doubles
+    return 2.0 ** math.ceil(math.log2(max(lod, 1e-6)))
+
+
+def _vertex_step(level: float):
+    # a curve of radius r is kept within TOLERANCE of its chords when the
+    # rotation step is c / sqrt(r), in item units at the given level
+    return math.sqrt(8 * TOLERANCE / level)
+
+
+def _polyline_path(r, rotation, limit: float):
+    # vertices up to the radius limit, r grows along the spiral
+    count = int(np.searchsorted(r, limit, 'right'))
+    r, rotation = r[:count], rotation[:count]
+    x, y = r * np.cos(rotation), r * np.sin(rotation)
+
+    path = QPainterPath()
+    if count:
+        path.addPolygon(QPolygonF([QPointF(x, -y) for x, y in zip(x.tolist(), y.tolist())]))
+    return path
+
+
+def _chunks(first: float, last: float):
+    # blocks of vertex indices covering [first, last]
+    first = max(int(math.floor(first / CHUNK)), 0)
+    last = max(int(math.floor(last / CHUNK)), first)
+    return first, min(last, first + MAX_POINTS // CHUNK)
+
+
+def _vertices(first_chunk: int, last_chunk: int):
+    return np.arange(first_chunk * CHUNK, (last_chunk + 1) * CHUNK + 1, dtype=float)
+
+
+def radial_range(rect: QRectF, center: QPointF = QPointF(0, 0)):
+    # nearest and farthest distance from center to the points of rect
+    dx = max(rect.left() - center.x(), 0, center.x() - rect.right())
+    dy = max(rect.top() - center.y(), 0, center.y() - rect.bottom())
+    far_x = max(abs(rect.left() - center.x()), abs(rect.right() - center.x()))
+    far_y = max(abs(rect.top() - center.y()), abs(rect.bottom() - center.y()))
+    return math.hypot(dx, dy), math.hypot(far_x, far_y)
+
+
+def archimedean_rotations(ro: float, level: float, r_min: float, r_max: float):
+    # (first, last) chunks of the vertices of r = ro * rotation between the
+    # radii; with the step c / sqrt(r) the k-th vertex is at
+    # rotation = (1.5 * c * k / sqrt(ro)) ** (2 / 3)
+    scale = math.sqrt(ro) / (1.5 * _vertex_step(level))
+    return _chunks((r_min / ro) ** 1.5 * scale, (r_max / ro) ** 1.5 * scale + 1)
+
+
+@lru_cache(maxsize=256)
+def archimedean_path(ro: float, level: float, first_chunk: int, last_chunk: int, limit: float):
+    c = _vertex_step(level)
+    rotation = (1.5 * c * _vertices(first_chunk, last_chunk) / math.sqrt(ro)) ** (2 / 3)
+
+    return _polyline_path(ro * rotation, rotation, limit)
+
+
+def logarithmic_rotations(r0: float, alpha: float, level: float, r_min: float, r_max: float):
+    # (first, last) chunks of the vertices of r = r0 * exp(alpha * rotation)
+    # between the radii, or None; with the step c / sqrt(r) the k-th vertex
+    # is at rotation = 2 / alpha * log(1 + alpha * c * k / (2 * sqrt(r0)))
+    if r_max < r0:
+        return None
+    scale = 2 * math.sqrt(r0) / (alpha * _vertex_step(level))
+    first = (math.sqrt(max(r_min, r0) / r0) - 1) * scale
+    last = (math.sqrt(r_max / r0) - 1) * scale + 1
+    return _chunks(first, last)
+
+
+@lru_cache(maxsize=256)
+def logarithmic_path(r0: float, alpha: float, delta: float, level: float,
+                     first_chunk: int, last_chunk: int, limit: float):
+    c = _vertex_step(level)
+    k = _vertices(first_chunk, last_chunk)
+    rotation = 2 / alpha * np.log1p(alpha * c * k / (2 * math.sqrt(r0)))
+
+    return _polyline_path(r0 * np.exp(alpha * rotation) + delta, rotation, limit)
 
 
 class BaseSpiral(QGraphicsItem):
@@ -17,36 +109,47 @@ class BaseSpiral(QGraphicsItem):
         self.pen = QPen()
         self.pen.setWidth(thickness)
         self.pen.setColor(color)
+        # the same width in pixels at any zoom
+        self.pen.setCosmetic(True)
 
+        # centered on the origin of the spirals, which is the item position
         self.height = 800
         self.width = 800
 
-        self.setPos(QPointF(0, 0))
-        self._update_origin_point()
-
-    def _update_origin_point(self):
-        self.setTransformOriginPoint(QPointF(self.width / 2, self.height / 2))
+        # exposedRect is needed to generate only the visible vertices
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
 
     def boundingRect(self):
-        return QRectF(0, 0, self.width, self.height)
-
-    def setPos(self, pos: QPointF):
-        dx = self.width / 2
-        dy = self.height / 2
-        super().setPos(pos - QPointF(dx, dy))
-
-    def pos(self):
-        dx = self.width / 2
-        dy = self.height / 2
-        return self.pos() + QPointF(dx, dy)
+        return QRectF(-self.width / 2, -self.height / 2, self.width, self.height)
 
     def set_size(self, width: int, height: int):
+        self.prepareGeometryChange()
         self.width = width
         self.height = height
-        self._update_origin_point()
 
     def paint(self, painter, options, widget=None):
         painter.setPen(self.pen)
+        painter.setBrush(Qt.NoBrush)
+
+    def limit(self):
+        # spirals end on the circle inscribed in the bounding rect
+        return min(self.width, self.height) / 2
+
+    def _view(self, painter, options):
+        # (detail level, visible rect in item coordinates); the exposed rect
+        # is cut to the painted device, which QGraphicsScene.render and
+        # painting without a view do not do
+        transform = painter.worldTransform()
+        lod = options.levelOfDetailFromTransform(transform)
+
+        rect = self.boundingRect()
+        if not options.exposedRect.isEmpty():
+            rect = rect.intersected(options.exposedRect)
+
+        inverted, invertible = transform.inverted()
+        if invertible:
+            rect = rect.intersected(inverted.mapRect(QRectF(painter.viewport())))
+        return detail_level(lod), rect
 
 
 class ArchimedeanSpiral(BaseSpiral):
@@ -66,27 +169,20 @@ class ArchimedeanSpiral(BaseSpiral):
     def paint(self, painter, options, widget=None):
         super().paint(painter, options, widget)
 
-        x = self.width / 2
-        y = self.height / 2 + self.radius
-        painter.translate(QPointF(x, y))
-
-        points = []
-        rotation, step_rotation = 0, 0.05
-        while True:
-            r = self.ro * rotation
-
-            x = r * math.cos(rotation)
-            y = r * math.sin(rotation)
+        level, rect = self._view(painter, options)
+        if self.ro <= 0 or rect.isEmpty():
+            return
 
-            if x > self.width / 2 or x < -self.width / 2:
-                break
-            if y > self.height / 2 or y < -self.height / 2:
-                break
+        # the spiral starts radius below the origin of the item
+        painter.translate(QPointF(0, self.radius))
+        r_min, r_max = radial_range(rect, QPointF(0, self.radius))
+        limit = self.limit() - self.radius
+        if r_min > limit:
+            return
 
-            rotation += step_rotation
-            points.append(QPointF(x, -y))
+        first, last = archimedean_rotations(self.ro, level, r_min, min(r_max, limit))
+        painter.drawPath(archimedean_path(self.ro, level, first, last, limit))
 
-        painter.drawPolyline(QPolygonF(points))
 
 class LogarithmicSpiral(BaseSpiral):
 
@@ -104,34 +200,27 @@ class LogarithmicSpiral(BaseSpiral):
         self.r0 = r0
         self.spiral_width = spiral_width
 
-    def paint(self, painter, options, widget):
+    def paint(self, painter, options, widget=None):
         super().paint(painter, options, widget)
 
-        x, y = self.width / 2, self.height / 2
-        painter.translate(QPointF(x, y))
-
-        self._paint_spiral(painter, self.alpha, self.spiral_width / 2)
-        self._paint_spiral(painter, self.alpha, 0)
-        self._paint_spiral(painter, self.alpha, -self.spiral_width / 2)
-
-    def _paint_spiral(self, painter, alpha: float, delta: int = 0):
-        points = []
-        rotation, step_rotation = 0, 0.05
-        while True:
-            r = self.r0 * math.exp(alpha *  rotation) + delta
-
-            x = r * math.cos(rotation)
-            y = r * math.sin(rotation)
+        level, rect = self._view(painter, options)
+        if rect.isEmpty():
+            return
+        r_min, r_max = radial_range(rect)
+        r_max = min(r_max, self.limit())
 
-            if x > self.width / 2 or x < -self.width / 2:
-                break
-            if y > self.height / 2 or y < -self.height / 2:
-                break
+        self._paint_spiral(painter, level, r_min, r_max, self.spiral_width / 2)
+        self._paint_spiral(painter, level, r_min, r_max, 0)
+        self._paint_spiral(painter, level, r_min, r_max, -self.spiral_width / 2)
 
-            rotation += step_rotation
-            points.append(QPointF(x, -y))
+    def _paint_spiral(self, painter, level: float, r_min: float, r_max: float, delta: float = 0):
+        if self.alpha <= 0 or self.r0 <= 0:
+            return
 
-        painter.drawPolyline(QPolygonF(points))
+        chunks = logarithmic_rotations(self.r0, self.alpha, level, r_min - delta, r_max - delta)
+        if chunks is not None:
+            painter.drawPath(logarithmic_path(self.r0, self.alpha, delta, level,
+                                              *chunks, self.limit()))
 
 
 class SystemArchimedeanSpirals(BaseSpiral):
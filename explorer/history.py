@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class History:
+
+    def __init__(self, columns, max_length: int = None, dtype=np.float64):
+        self.columns = tuple(columns)
+        self._indexes = {name: index for index, name in enumerate(self.columns)}
+        # None grows without bound, otherwise only the last max_length
+        # samples are kept
+        self.max_length = max_length
+        self.dtype = np.dtype(dtype)
+
+        self.clear()
+
+    def clear(self):
+        if self.max_length is None:
+            size = 1024
+        else:
+            # every sample is stored twice, at i and i + max_length, so the
+            # ring always has a contiguous window and views need no copy
+            size = 2 * self.max_length
+
+        self._data = np.empty((len(self.columns), size), dtype=self.dtype)
+        self._start = 0
+        self._length = 0
+        # samples appended since the last clear, it keeps growing once a
+        # ring is full and its length stays at max_length
+        self.count = 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name: str):
+        # contiguous view on the stored samples, without a copy. The next
+        # append may overwrite it in place, so readers on other threads than
+        # the writer's must hold the writer's lock as long as they use it
+        return self._data[self._indexes[name], self._start:self._start + self._length]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __contains__(self, name: str):
+        return name in self._indexes
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def append(self, *values):
+        self.count += 1
+        if self.max_length is None:
+            if self._length == self._data.shape[1]:
+                self._grow(2 * self._length)
+            self._data[:, self._length] = values
+            self._length += 1
+            return
+
+        if not self.max_length:
+            return
+
+        position = (self._start + self._length) % self.max_length
+        self._data[:, position] = values
+        self._data[:, position + self.max_length] = values
+
+        if self._length < self.max_length:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.max_length
+
+    def extend(self, *columns):
+        values = np.asarray(columns, dtype=self.dtype).reshape(len(self.columns), -1)
+        count = values.shape[1]
+        if not count:
+            return
+        self.count += count
+
+        if self.max_length is None:
+            size = self._data.shape[1]
+            if self._length + count > size:
+                while size < self._length + count:
+                    size *= 2
+                self._grow(size)
+            self._data[:, self._length:self._length + count] = values
+            self._length += count
+            return
+
+        if not self.max_length:
+            return
+
+        if count >= self.max_length:
+            values = values[:, -self.max_length:]
+            self._data[:, :self.max_length] = values
+            self._data[:, self.max_length:] = values
+            self._start, self._length = 0, self.max_length
+            return
+
+        positions = (self._start + self._length + np.arange(count)) % self.max_length
+        self._data[:, positions] = values
+        self._data[:, positions + self.max_length] = values
+
+        overflow = max(self._length + count - self.max_length, 0)
+        self._length = min(self._length + count, self.max_length)
+        self._start = (self._start + overflow) % self.max_length
+
+    def _grow(self, size: int):
+        data = np.empty((len(self.columns), size), dtype=self.dtype)
+        data[:, :self._length] = self._data[:, :self._length]
+        self._data = data
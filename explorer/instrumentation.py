@@ -0,0 +1,79 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class FrameProfiler:
+
+    def __init__(self, window: int = 120, trace_length: int = 100000):
+        # number of recent samples the rolling statistics are taken over
+        self.window = window
+        self.enabled = True
+
+        self._stages = {}
+        self._frames = deque(maxlen=window)
+        # (start, stage, duration) in seconds from the profiler creation
+        self.trace = deque(maxlen=trace_length)
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def record(self, name: str, start: float, duration: float):
+        # deque appends are atomic, stages are recorded from both the GUI
+        # and the simulation worker threads
+        timings = self._stages.get(name)
+        if timings is None:
+            timings = self._stages.setdefault(name, deque(maxlen=self.window))
+        timings.append(duration)
+        self.trace.append((start - self._origin, name, duration))
+
+    def frame(self):
+        if self.enabled:
+            self._frames.append(time.perf_counter())
+
+    def fps(self):
+        frames = list(self._frames)
+        if len(frames) < 2 or frames[-1] == frames[0]:
+            return 0.0
+        return (len(frames) - 1) / (frames[-1] - frames[0])
+
+    def timings(self):
+        # mean duration of every stage over the window, seconds
+        timings = {}
+        for name, durations in list(self._stages.items()):
+            durations = list(durations)
+            if durations:
+                timings[name] = sum(durations) / len(durations)
+        return timings
+
+    def reset(self):
+        self._stages.clear()
+        self._frames.clear()
+        self.trace.clear()
+
+    def export(self, path: str):
+        # json when path ends with .json, csv otherwise
+        rows = list(self.trace)
+
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump([{'start': start, 'stage': name, 'duration': duration}
+                           for start, name, duration in rows], f)
+            return
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('start', 'stage', 'duration'))
+            writer.writerows(rows)
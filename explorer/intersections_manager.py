@@ -1,20 +1,55 @@
-import math
+import threading
 
-from array import array
-from collections import defaultdict
-from pyqtgraph import PlotWidget, mkPen
+from PyQt5.QtCore import QTimer
+
+import numpy as np
+
+from .history import History
 
 
 class IntersectionsManager:
 
-    def __init__(self, parameters: dict, parent=None):
-        self.parameters = parameters
+    def __init__(self,
+                 parameters: dict,
+                 engine,
+                 parent=None,
+                 history_length: int = None):
+
         self.parent = parent
+        self.set_engine(parameters, engine)
+        # update_batch may run on the simulation worker thread. It only
+        # queues its samples under the lock, the histories are written and
+        # read on the GUI thread, by flush
+        self.lock = threading.Lock()
+        # None keeps the whole run, otherwise the last history_length samples
+        self.history_length = history_length
+
+        # pyqtgraph is imported and the graph built on the first show_graph
+        self.graph_widget = None
+        # History.count of the sun trajectory when the graph was last drawn
+        self._plotted_count = None
+
+        # interval of the flushes and of the redraws of the open graph, msec
+        self.graph_timer = QTimer()
+        self.graph_timer.setInterval(100)
+        self.graph_timer.timeout.connect(self._refresh_visible_graph)
+
+        self.restart()
+        self.graph_timer.start()
+
+    def set_engine(self, parameters: dict, engine):
+        # the history is kept until the next restart
+        self.parameters = parameters
+        self.engine = engine
+        self.config = engine.config
+        self.detector = engine.detector
+
+    def _create_graph_widget(self):
+        from pyqtgraph import PlotWidget
 
         self.graph_widget = PlotWidget()
         self._settings_graph_widget()
-
-        self.restart()
+        self._create_curves()
 
     def _settings_graph_widget(self):
         self.graph_widget.setBackground('w')
@@ -35,90 +70,166 @@ class IntersectionsManager:
         plot_item.setYRange(0, 16)
         plot_item.invertX(True)
 
+    @property
+    def nbytes(self):
+        histories = (self.data_sun, self.data_arch_spirals,
+                     self.data_log_spirals, self.data_log_crossings,
+                     self.data_log_band)
+        with self.lock:
+            pending = sum(values.nbytes for history, columns in self._pending
+                          for values in columns)
+        return sum(history.nbytes for history in histories) + pending
+
     def update(self,
                time: float,
                sun_distance: float,
                sun_rotation: float):
 
-        self.data_sun['x'].append(time)
-        self.data_sun['y'].append(sun_distance)
+        self.update_batch(np.array([time]),
+                          np.array([sun_distance]),
+                          np.array([sun_rotation]))
 
-        self.intersection_arch_spirals(time, sun_distance, sun_rotation)
-        self.intersection_log_spirals(time, sun_distance, sun_rotation)
+    def update_batch(self, time, sun_distance, sun_rotation):
+        with self.lock:
+            self._pending.append((self.data_sun, (time, sun_distance)))
 
-    def intersection_arch_spirals(self, time, sun_distance, sun_rotation):
-        ro = self.parameters['arch_spirals']['ro']['value']
-        period = self.parameters['arch_spirals']['period']['value']
-        V0 = self.parameters['arch_spirals']['V0']['value']
+            radii = self.engine.log_spirals_radii(time, sun_rotation)
+            self._pending.append((self.data_log_spirals, (time, *radii)))
 
-        r_spiral = V0 * (28 + period / 2 * self.k - time)
-        if sun_distance > r_spiral:
-            self.data_arch_spirals['x'].append(time)
-            self.data_arch_spirals['y'].append(sun_distance)
-            self.k += 1
+            samples = (time, sun_distance, sun_rotation)
+            if self.previous is not None:
+                samples = [np.concatenate(([previous], values))
+                           for previous, values in zip(self.previous, samples)]
 
-    def intersection_log_spirals(self, time, sun_distance, sun_rotation):
-        r0 = self.parameters['log_spirals']['r0']['value']
-        alpha = self.parameters['log_spirals']['alpha']['value']
-        period = self.parameters['log_spirals']['period']['value']
-        start_rotation = self.parameters['log_spirals']['rotation']['value']
+            arch_crossings = self.intersection_arch_spirals(*samples)
+            log_crossings = self.intersection_log_spirals(*samples)
+            band_crossings = self.intersection_log_bands(*samples)
+
+            self.previous = tuple(values[-1] for values in samples)
 
-        omega = 360 / period
+        return arch_crossings, log_crossings, band_crossings
 
-        fi = math.radians(sun_rotation - omega * time + start_rotation - 90 + 360)
-        r_spiral1 = r0 * math.exp(alpha * fi)
+    def flush(self):
+        # moves the queued samples into the histories; the lock is only
+        # held to take the queue, so it costs the worker nothing however
+        # long the history is
+        with self.lock:
+            pending, self._pending = self._pending, []
+        for history, columns in pending:
+            history.extend(*columns)
 
-        fi = math.radians(sun_rotation - omega * time + start_rotation - 180 + 360)
-        r_spiral2 = r0 * math.exp(alpha * fi)
+    def load(self, result, time: float):
+        # history of a run from t = 0 up to, but not including, time
+        self.restart()
 
-        fi = math.radians(sun_rotation - omega * time + start_rotation + 360)
-        r_spiral3 = r0 * math.exp(alpha * fi)
+        count = int(np.searchsorted(result.time, time))
+        if not count:
+            return
 
-        fi = math.radians(sun_rotation - omega * time + start_rotation + 90 + 360)
-        r_spiral4 = r0 * math.exp(alpha * fi)
+        self.data_sun.extend(result.time[:count], result.sun_distance[:count])
+        self.data_log_spirals.extend(result.time[:count], *result.log_spirals_radii[:, :count])
 
-        self.data_log_spirals['x'].append(time)
-        self.data_log_spirals['y1'].append(r_spiral1)
-        self.data_log_spirals['y2'].append(r_spiral2)
-        self.data_log_spirals['y3'].append(r_spiral3)
-        self.data_log_spirals['y4'].append(r_spiral4)
+        last = count - 1
+        for crossings, data in ((result.arch_crossings, self.data_arch_spirals),
+                                (result.log_crossings, self.data_log_crossings),
+                                (result.log_band_crossings, self.data_log_band)):
+            index = np.searchsorted(crossings.time, result.time[last], 'right')
+            data.extend(crossings.time[:index], crossings.distance[:index])
 
-    def show_graph(self):
-        self.graph_widget.clear()
+        with self.lock:
+            self.previous = (result.time[last],
+                             result.sun_distance[last],
+                             result.sun_galactic_rotation[last])
+
+    def intersection_arch_spirals(self, time, sun_distance, sun_rotation):
+        # exact crossing epochs between consecutive samples
+        crossings = self.detector.arch_crossings(time, sun_distance)
+        self._pending.append((self.data_arch_spirals, (crossings.time, crossings.distance)))
+        return crossings
+
+    def intersection_log_spirals(self, time, sun_distance, sun_rotation):
+        crossings = self.detector.log_crossings(time, sun_distance, sun_rotation)
+        self._pending.append((self.data_log_crossings, (crossings.time, crossings.distance)))
+        return crossings
+
+    def intersection_log_bands(self, time, sun_distance, sun_rotation):
+        # entries into and exits from the width wide bands of the arms
+        crossings = self.detector.log_band_crossings(time, sun_distance, sun_rotation)
+        self._pending.append((self.data_log_band, (crossings.time, crossings.distance)))
+        return crossings
+
+    def _create_curves(self):
+        from pyqtgraph import mkPen
+
+        plot_item = self.graph_widget.getPlotItem()
 
         # sun trajectory
-        x, y = self.data_sun['x'], self.data_sun['y']
         pen = mkPen(width=5)
-        self.graph_widget.plot(x, y, pen=pen)
+        self.curve_sun = plot_item.plot(pen=pen)
 
         # arch
-        x, y = self.data_arch_spirals['x'], self.data_arch_spirals['y']
-        self.graph_widget.plot(x, y, pen=None, symbol='+', symbolSize=10, symbolPen='b')
+        self.curve_arch_spirals = plot_item.plot(pen=None, symbol='+',
+                                                 symbolSize=10, symbolPen='b')
 
         # log
-        x, y = self.data_log_spirals['x'], self.data_log_spirals['y1']
-        pen = mkPen(width=5)
-        self.graph_widget.plot(x, y, pen=pen)
+        self.curves_log_spirals = [plot_item.plot(pen=mkPen(width=5)) for i in range(4)]
+        self.curve_log_crossings = plot_item.plot(pen=None, symbol='o',
+                                                  symbolSize=10, symbolPen='r')
+        self.curve_log_band = plot_item.plot(pen=None, symbol='t',
+                                             symbolSize=8, symbolPen='g')
+
+        # only the visible range is drawn, reduced to about one min/max
+        # pair per pixel column
+        for curve in [self.curve_sun] + self.curves_log_spirals:
+            curve.setClipToView(True)
+            curve.setDownsampling(auto=True, method='peak')
+
+    def refresh_graph(self):
+        if self.graph_widget is None:
+            return
+
+        self.flush()
+        # the curves get views; the histories are only written by flush, on
+        # this thread, and every flush that adds samples is followed by a
+        # setData before the next paint
+        self.curve_sun.setData(self.data_sun['x'], self.data_sun['y'])
+        self.curve_arch_spirals.setData(self.data_arch_spirals['x'],
+                                        self.data_arch_spirals['y'])
+
+        x = self.data_log_spirals['x']
+        for curve, name in zip(self.curves_log_spirals, ('y1', 'y2', 'y3', 'y4')):
+            curve.setData(x, self.data_log_spirals[name])
+
+        self.curve_log_crossings.setData(self.data_log_crossings['x'],
+                                         self.data_log_crossings['y'])
+        self.curve_log_band.setData(self.data_log_band['x'], self.data_log_band['y'])
+
+        self._plotted_count = self.data_sun.count
+
+    def _refresh_visible_graph(self):
+        self.flush()
+        if self.graph_widget is None or not self.graph_widget.isVisible():
+            return
+        if self.data_sun.count != self._plotted_count:
+            self.refresh_graph()
 
-        x, y = self.data_log_spirals['x'], self.data_log_spirals['y2']
-        pen = mkPen(width=5)
-        self.graph_widget.plot(x, y, pen=pen)
-
-        x, y = self.data_log_spirals['x'], self.data_log_spirals['y3']
-        pen = mkPen(width=5)
-        self.graph_widget.plot(x, y, pen=pen)
-
-        x, y = self.data_log_spirals['x'], self.data_log_spirals['y4']
-        pen = mkPen(width=5)
-        self.graph_widget.plot(x, y, pen=pen)
+    def show_graph(self):
+        if self.graph_widget is None:
+            self._create_graph_widget()
 
+        self.refresh_graph()
         self.graph_widget.show()
 
     def restart(self):
-        self.k = 0
-        self.graph_widget.clear()
-
-        self.data_sun = defaultdict(list)
-        self.data_arch_spirals = defaultdict(list)
-        self.data_log_spirals = defaultdict(list)
-
+        with self.lock:
+            self.previous = None
+            self._pending = []
+
+            length = self.history_length
+            self.data_sun = History(('x', 'y'), length)
+            self.data_arch_spirals = History(('x', 'y'), length)
+            self.data_log_spirals = History(('x', 'y1', 'y2', 'y3', 'y4'), length)
+            self.data_log_crossings = History(('x', 'y'), length)
+            self.data_log_band = History(('x', 'y'), length)
+
+        self.refresh_graph()
@@ -3,6 +3,34 @@ import math
 from abc import ABC, abstractmethod
 from functools import lru_cache
 
+import numpy as np
+
+
+def solve_kepler(mean_anomaly,
+                 eccentricity: float,
+                 tolerance: float = 1e-12,
+                 max_iterations: int = 50):
+    # Newton iterations on E - e * sin(E) = M for an array of mean anomalies.
+    # M is reduced to [-pi, pi) and started from Danby's guess, which keeps
+    # the iteration convergent up to e -> 1. Every element stops at its own
+    # converged step, so E does not depend on the rest of the array.
+    mean_anomaly = np.asarray(mean_anomaly, dtype=float)
+    e = eccentricity
+
+    revolutions = np.floor((mean_anomaly + math.pi) / (2 * math.pi))
+    M = mean_anomaly - 2 * math.pi * revolutions
+
+    E = M + 0.85 * e * np.sign(M)
+    active = np.ones(E.shape, dtype=bool)
+    for i in range(max_iterations):
+        delta = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E = np.where(active, E - delta, E)
+        active &= np.abs(delta) >= tolerance
+        if not active.any():
+            break
+
+    return E + 2 * math.pi * revolutions
+
 
 class LawMotion(ABC):
 
@@ -21,6 +49,10 @@ class CircularMotion(LawMotion):
         rotation = self.rotational_speed * time + self.start_rotation
         return round(rotation, 5)
 
+    def evaluate(self, times):
+        times = np.asarray(times, dtype=float)
+        return self.rotational_speed * times + self.start_rotation
+
 
 class EllipticalKeplersMotion(LawMotion):
 
@@ -28,12 +60,16 @@ class EllipticalKeplersMotion(LawMotion):
             period: float,
             s_major_axis: float,
             eccentricity: float,
-            start_rotation: float = 0):
+            start_rotation: float = 0,
+            tolerance: float = 1e-12,
+            max_iterations: int = 50):
 
         self.period = period
         self.s_major_axis = s_major_axis
         self.eccentricity = eccentricity
         self.start_rotation = start_rotation
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
 
         self.n = self.compute_n()
         self.tau = self.compute_tau()
@@ -57,10 +93,19 @@ class EllipticalKeplersMotion(LawMotion):
         return self.n * (time - self.tau)
 
     def eccentric_anomaly(self, mean_anomaly: float):
-        E = mean_anomaly
-        for i in range(10):
-            E = mean_anomaly + self.eccentricity * math.sin(E)
-        return E
+        e = self.eccentricity
+
+        revolutions = math.floor((mean_anomaly + math.pi) / (2 * math.pi))
+        M = mean_anomaly - 2 * math.pi * revolutions
+
+        E = M + 0.85 * e * math.copysign(1, M)
+        for i in range(self.max_iterations):
+            delta = (E - e * math.sin(E) - M) / (1 - e * math.cos(E))
+            E -= delta
+            if abs(delta) < self.tolerance:
+                break
+
+        return E + 2 * math.pi * revolutions
 
     def true_anomaly(self, eccentric_anomaly: float):
         e = self.eccentricity
@@ -85,9 +130,43 @@ class EllipticalKeplersMotion(LawMotion):
         return round(f, 5)
 
     def full_rotation(self, time: float):
-        rotation = math.degrees(self.rotation(time))
-        if rotation < 0:
-            rotation += 360
-        rotation = rotation + (time - self.tau) // self.period * 360
-        return rotation
+        # revolutions are counted from E as in evaluate(); a floor division
+        # of the time on top of the rounded, wrapped true anomaly could be
+        # one revolution off around the pericentre
+        return self.state(time)[1]
+
+    def state(self, time: float):
+        # distance and full rotation (degrees) of evaluate() at a single
+        # time, without the numpy overhead
+        a, e = self.s_major_axis, self.eccentricity
+        E = self.eccentric_anomaly(self.mean_anomaly(time))
+
+        revolutions = math.floor((E + math.pi) / (2 * math.pi))
+        E -= 2 * math.pi * revolutions
+        true_anomaly = 2 * math.atan2(math.sqrt(1 + e) * math.sin(E / 2),
+                                      math.sqrt(1 - e) * math.cos(E / 2))
+
+        return a * (1 - e * math.cos(E)), math.degrees(true_anomaly) + revolutions * 360
+
+    def evaluate(self, times):
+        # distance, true anomaly (radians, [-pi, pi]) and full rotation
+        # (degrees) for an array of times from a single Kepler solve
+        times = np.asarray(times, dtype=float)
+        a, e = self.s_major_axis, self.eccentricity
+
+        M = self.mean_anomaly(times)
+        E = solve_kepler(M, e, self.tolerance, self.max_iterations)
+
+        distance = a * (1 - e * np.cos(E))
+
+        # atan2 form stays finite at E = pi, where tan(E / 2) diverges
+        revolutions = np.floor((E + math.pi) / (2 * math.pi))
+        E = E - 2 * math.pi * revolutions
+        true_anomaly = 2 * np.arctan2(math.sqrt(1 + e) * np.sin(E / 2),
+                                      math.sqrt(1 - e) * np.cos(E / 2))
+
+        # counting revolutions from E keeps it continuous across the
+        # pericentre, as in full_rotation()
+        full_rotation = np.degrees(true_anomaly) + revolutions * 360
 
+        return distance, true_anomaly, full_rotation
@@ -0,0 +1,245 @@
+import os
+import sys
+import math
+import json
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from .config import CONSTRAINTS, compile_parameters
+from .population import Population, PopulationCrossings, PopulationEngine
+
+
+def distributions(parameters: dict):
+    # 'group.name' -> ('normal', mean, sigma) or ('uniform', low, high) for
+    # every parameter with a 'sigma' or a 'range' next to its 'value'
+    result = {}
+    for group, values in parameters.items():
+        for name, config in values.items():
+            key = '{}.{}'.format(group, name)
+            if 'sigma' in config:
+                result[key] = ('normal', config.get('mean', config['value']), config['sigma'])
+            elif 'range' in config:
+                low, high = config['range']
+                result[key] = ('uniform', low, high)
+    return result
+
+
+def sample_parameters(parameters: dict, count: int, seed: int = None):
+    # 'group.name' -> array of count values for every uncertain parameter
+    # and the mask of the samples that ModelConfig accepts
+    random = np.random.default_rng(seed)
+
+    samples = {}
+    for key, (kind, first, second) in distributions(parameters).items():
+        if kind == 'normal':
+            samples[key] = random.normal(first, second, count)
+        else:
+            samples[key] = random.uniform(first, second, count)
+
+    valid = np.ones(count, dtype=bool)
+    for key, values in samples.items():
+        if key in CONSTRAINTS:
+            condition, message = CONSTRAINTS[key]
+            valid &= condition(values)
+
+    return samples, valid
+
+
+class SampledEngine(PopulationEngine):
+
+    # every sample of the parameters is a star of the population: its own
+    # sun orbit and its own spiral patterns
+
+    def __init__(self, parameters, samples: dict, tolerance: float = 1e-6):
+        config = compile_parameters(parameters)
+        self.samples = samples
+        self.count = len(next(iter(samples.values()))) if samples else 1
+
+        population = Population(self.value(config, 'orbit.s_major_axis'),
+                                self.value(config, 'orbit.eccentricity'),
+                                np.radians(self.value(config, 'orbit.sun_rotation')),
+                                np.zeros(self.count),
+                                self.value(config, 'orbit.sun_period'))
+
+        super().__init__(config, population, tolerance)
+
+    def value(self, config, key: str):
+        # samples of a parameter or its value repeated for every sample
+        if key in self.samples:
+            return np.asarray(self.samples[key], dtype=float)
+        group, name = key.split('.')
+        return np.full(self.count, getattr(getattr(config, group), name))
+
+    def settings_galaxy(self):
+        config = self.config
+        log_period = self.value(config, 'log_spirals.period')
+
+        self.orbit_speed = 2 * math.pi / self.value(config, 'orbit.orbit_period')
+        self.orbit_start = np.radians(self.value(config, 'orbit.orbit_rotation'))
+
+        self.log_omega = 360 / log_period
+        self.log_phase = self.value(config, 'log_spirals.rotation') + 360
+        self.log_r0 = self.value(config, 'log_spirals.r0')
+        self.log_alpha = np.radians(self.value(config, 'log_spirals.alpha'))
+
+        self.arch_V0 = self.value(config, 'arch_spirals.V0')
+        self.arch_spacing = self.value(config, 'arch_spirals.period') / 2
+
+
+def occurrences(crossings: PopulationCrossings):
+    # number of the crossing among the crossings of the same sample with
+    # the same arm in the same direction, in time order
+    order = np.lexsort((crossings.time, crossings.direction, crossings.arm, crossings.star))
+    keys = np.stack((crossings.star, crossings.arm, crossings.direction))[:, order]
+
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = np.any(keys[:, 1:] != keys[:, :-1], axis=0)
+    starts = np.flatnonzero(new_group)
+    lengths = np.diff(np.append(starts, len(order)))
+
+    occurrence = np.empty(len(order), dtype=int)
+    occurrence[order] = np.arange(len(order)) - np.repeat(starts, lengths)
+    return occurrence
+
+
+def crossing_statistics(crossings: PopulationCrossings, count: int, confidence: float = 0.95):
+    # distribution of the n-th crossing of every arm in every direction over
+    # the samples, rows ordered by the mean crossing time
+    if not len(crossings):
+        return []
+
+    occurrence = occurrences(crossings)
+    order = np.lexsort((occurrence, crossings.direction, crossings.arm))
+    keys = np.stack((crossings.arm, crossings.direction, occurrence))[:, order]
+    time = crossings.time[order]
+
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = np.any(keys[:, 1:] != keys[:, :-1], axis=0)
+    starts = np.flatnonzero(new_group)
+
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    for group in np.split(np.arange(len(order)), starts[1:]):
+        times = time[group]
+        low, median, high = np.percentile(times, (tail, 50, 100 - tail))
+        arm, direction, number = keys[:, group[0]]
+        rows.append({
+            'arm': int(arm),
+            'direction': int(direction),
+            'occurrence': int(number),
+            # fraction of the samples that have this crossing
+            'fraction': len(times) / count,
+            'mean': float(times.mean()),
+            'std': float(times.std()),
+            'median': float(median),
+            'low': float(low),
+            'high': float(high),
+        })
+
+    rows.sort(key=lambda row: row['mean'])
+    return rows
+
+
+_base_parameters = None
+
+
+def _init_worker(parameters: dict):
+    global _base_parameters
+    _base_parameters = parameters
+
+
+def _run_chunk(task):
+    offset, samples, t_start, t_end, step = task
+
+    engine = SampledEngine(_base_parameters, samples)
+    arch, log = engine.run(t_start, t_end, step)
+    for crossings in (arch, log):
+        crossings.star = crossings.star + offset
+    return arch, log
+
+
+def monte_carlo(parameters: dict,
+                count: int,
+                t_start: float = 0,
+                t_end: float = 1000,
+                step: float = 0.5,
+                seed: int = None,
+                processes: int = None,
+                chunk_size: int = 2000):
+    # crossings of all the valid samples, star is the index of the sample
+    # among the valid ones; returns (arch, log, valid samples count)
+    samples, valid = sample_parameters(parameters, count, seed)
+    samples = {key: values[valid] for key, values in samples.items()}
+    count = int(valid.sum())
+    if not samples:
+        # nothing is uncertain, a single run is enough
+        count = min(count, 1)
+
+    tasks = [(start,
+              {key: values[start:start + chunk_size] for key, values in samples.items()},
+              t_start, t_end, step)
+             for start in range(0, count, chunk_size)]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _init_worker(parameters)
+        results = [_run_chunk(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, _init_worker, (parameters,)) as pool:
+            results = pool.map(_run_chunk, tasks, 1)
+
+    arch = PopulationCrossings.concatenate([item[0] for item in results])
+    log = PopulationCrossings.concatenate([item[1] for item in results])
+    return arch, log, count
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog='python -m explorer.montecarlo',
+                                     description='Monte Carlo uncertainty of the crossing epochs')
+    parser.add_argument('parameters',
+                        help='parameters json, uncertain values carry "sigma" or "range"')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--t-start', type=float, default=0)
+    parser.add_argument('--t-end', type=float, default=1000)
+    parser.add_argument('--step', type=float, default=0.5)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', help='json file, stdout by default')
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+
+    with open(args.parameters, 'r') as f:
+        parameters = json.load(f)
+
+    arch, log, count = monte_carlo(parameters, args.samples,
+                                   args.t_start, args.t_end, args.step,
+                                   args.seed, args.processes)
+
+    report = {
+        'samples': args.samples,
+        # samples outside of the allowed values are dropped
+        'valid_samples': count,
+        'confidence': args.confidence,
+        'distributions': {key: list(value)
+                          for key, value in distributions(parameters).items()},
+        'arch': crossing_statistics(arch, count, args.confidence),
+        'log': crossing_statistics(log, count, args.confidence),
+    }
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(report, output, indent=2)
+        output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import math
+
+import numpy as np
+
+from .config import LogSpiralsConfig, compile_parameters
+from .engine import timeline
+from .crossings import Crossings, find_roots
+from .laws_motions import solve_kepler
+
+
+def _take(value, stars):
+    # per star value of a parameter that may be shared by all the stars
+    if np.ndim(value) == 0:
+        return value
+    return value[stars]
+
+
+class Population:
+
+    def __init__(self, s_major_axis, eccentricity, start_rotation, orientation, period):
+        # one entry per star: semi-major axis, kpk; start true anomaly and
+        # orientation of the apsides, radians; orbital period, mln. years
+        self.s_major_axis = np.asarray(s_major_axis, dtype=float)
+        self.eccentricity = np.asarray(eccentricity, dtype=float)
+        self.start_rotation = np.asarray(start_rotation, dtype=float)
+        self.orientation = np.asarray(orientation, dtype=float)
+        self.period = np.asarray(period, dtype=float)
+
+    def __len__(self):
+        return len(self.s_major_axis)
+
+
+def sample_population(parameters,
+                      count: int,
+                      s_major_axis_range=(4, 14),
+                      eccentricity_range=(0, 0.5),
+                      seed: int = None):
+    # semi-major axes, eccentricities and phases uniform in their ranges,
+    # periods scaled from the sun's orbit by Kepler's third law
+    orbit = compile_parameters(parameters).orbit
+    random = np.random.default_rng(seed)
+
+    s_major_axis = random.uniform(*s_major_axis_range, count)
+    eccentricity = random.uniform(*eccentricity_range, count)
+    start_rotation = random.uniform(-math.pi, math.pi, count)
+    orientation = random.uniform(0, 2 * math.pi, count)
+    period = orbit.sun_period * (s_major_axis / orbit.s_major_axis) ** 1.5
+
+    return Population(s_major_axis, eccentricity, start_rotation, orientation, period)
+
+
+class PopulationCrossings(Crossings):
+
+    def __init__(self, time, arm, distance, direction, star):
+        super().__init__(time, arm, distance, direction)
+        # index of the star in the population
+        self.star = star
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), np.empty(0, dtype=int), np.empty(0),
+                   np.empty(0, dtype=int), np.empty(0, dtype=int))
+
+    @classmethod
+    def concatenate(cls, crossings):
+        crossings = [item for item in crossings if len(item)]
+        if not crossings:
+            return cls.empty()
+
+        columns = [np.concatenate([getattr(item, name) for item in crossings])
+                   for name in ('time', 'arm', 'distance', 'direction', 'star')]
+        order = np.argsort(columns[0], kind='stable')
+        return cls(*(column[order] for column in columns))
+
+
+class PopulationEngine:
+
+    def __init__(self, parameters, population: Population, tolerance: float = 1e-6):
+        self.config = compile_parameters(parameters)
+        self.population = population
+        self.tolerance = tolerance
+
+        self.settings_galaxy()
+
+        self.n = 2 * math.pi / population.period
+        self.tau = self._compute_tau()
+
+    def settings_galaxy(self):
+        # rotation of the orbit and of the spiral patterns, either scalars
+        # shared by all the stars or arrays with a value per star
+        orbit = self.config.orbit
+        log_spirals = self.config.log_spirals
+        arch_spirals = self.config.arch_spirals
+
+        self.orbit_speed = 2 * math.pi / orbit.orbit_period
+        self.orbit_start = orbit.orbit_rotation_radians
+
+        self.log_omega = log_spirals.omega
+        self.log_phase = log_spirals.phase
+        self.log_r0 = log_spirals.r0
+        self.log_alpha = log_spirals.alpha_per_degree
+
+        self.arch_V0 = arch_spirals.V0
+        self.arch_spacing = arch_spirals.spacing
+
+    def _compute_tau(self):
+        # time of the pericentre passage, as EllipticalKeplersMotion.compute_tau
+        e = self.population.eccentricity
+        f = self.population.start_rotation
+
+        E = 2 * np.arctan(np.tan(f / 2) / np.sqrt((1 + e) / (1 - e)))
+        M = E - e * np.sin(E)
+        return -M / self.n
+
+    def evaluate(self, time, stars=None):
+        # distance, kpk, and galactic rotation, degrees, of the stars at time;
+        # time of shape (T, 1) gives (T, N) arrays
+        population = self.population
+        if stars is None:
+            stars = slice(None)
+
+        a = population.s_major_axis[stars]
+        e = population.eccentricity[stars]
+
+        M = self.n[stars] * (time - self.tau[stars])
+        E = solve_kepler(M, e)
+
+        distance = a * (1 - e * np.cos(E))
+
+        revolutions = np.floor((E + math.pi) / (2 * math.pi))
+        E = E - 2 * math.pi * revolutions
+        true_anomaly = 2 * np.arctan2(np.sqrt(1 + e) * np.sin(E / 2),
+                                      np.sqrt(1 - e) * np.cos(E / 2))
+
+        rotation = true_anomaly + population.orientation[stars]
+        rotation = rotation + (_take(self.orbit_speed, stars) * time +
+                               _take(self.orbit_start, stars))
+        galactic_rotation = np.degrees(rotation) + revolutions * 360 - 90
+
+        return distance, galactic_rotation
+
+    def positions(self, time: float):
+        # x, y in kpk with y up, the galactic centre at the origin
+        distance, galactic_rotation = self.evaluate(time)
+        rotation = np.radians(galactic_rotation + 90)
+        return distance * np.cos(rotation), distance * np.sin(rotation)
+
+    def log_spirals_radii(self, time, galactic_rotation, stars=None):
+        # radii of the four arms at the stars' position angles, (4, ...)
+        if stars is None:
+            stars = slice(None)
+
+        phase = (galactic_rotation - _take(self.log_omega, stars) * time +
+                 _take(self.log_phase, stars))
+        offsets = np.asarray(LogSpiralsConfig.OFFSETS, dtype=float)
+        offsets = offsets.reshape((-1,) + (1,) * np.ndim(phase))
+
+        r0, alpha = _take(self.log_r0, stars), _take(self.log_alpha, stars)
+        return r0 * np.exp(alpha * (phase + offsets))
+
+    def run(self, t_start: float = 0, t_end: float = 1000, step: float = 0.5,
+            block_size: int = 4000000):
+        # crossings of every star with both spiral systems; time is processed
+        # in blocks of about block_size star-epochs to bound memory
+        time = timeline(t_start, t_end, step)
+        rows = max(block_size // max(len(self.population), 1), 2)
+
+        arch, log = [], []
+        for start in range(0, len(time) - 1, rows - 1):
+            block = time[start:start + rows]
+            arch_block, log_block = self._block_crossings(block)
+            arch.append(arch_block)
+            log.append(log_block)
+
+        return PopulationCrossings.concatenate(arch), PopulationCrossings.concatenate(log)
+
+    def _block_crossings(self, time):
+        if len(time) < 2:
+            return PopulationCrossings.empty(), PopulationCrossings.empty()
+
+        time = time[:, np.newaxis]
+        distance, galactic_rotation = self.evaluate(time)
+
+        return (self._arch_crossings(time, distance),
+                self._log_crossings(time, distance, galactic_rotation))
+
+    def _arch_crossings(self, time, distance):
+        V0, spacing = self.arch_V0, self.arch_spacing
+        start = self.config.arch_spirals.FRONT_START
+
+        excess = (distance + V0 * time) / V0 - start
+        low = np.minimum(excess[:-1], excess[1:])
+        high = np.maximum(excess[:-1], excess[1:])
+
+        first = np.maximum(np.floor(low / spacing).astype(int) + 1, 0)
+        counts = np.maximum(np.floor(high / spacing).astype(int) - first + 1, 0)
+
+        step, star = np.nonzero(counts)
+        counts = counts[step, star]
+        first = first[step, star]
+
+        repeat = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        arm = first[repeat] + offsets
+        step, star = step[repeat], star[repeat]
+        V0, spacing = _take(V0, star), _take(spacing, star)
+
+        def func(index, arm, t):
+            distance, galactic_rotation = self.evaluate(t, star[index])
+            return distance - _take(V0, index) * (start + _take(spacing, index) * arm - t)
+
+        return self._refine(func, arm, star, time[step, 0], time[step + 1, 0])
+
+    def _log_crossings(self, time, distance, galactic_rotation):
+        radii = self.log_spirals_radii(time, galactic_rotation)
+        positive = distance >= radii
+        arm, step, star = np.nonzero(positive[:, 1:] != positive[:, :-1])
+
+        def func(index, arm, t):
+            distance, galactic_rotation = self.evaluate(t, star[index])
+            radii = self.log_spirals_radii(t, galactic_rotation, star[index])
+            return distance - radii[arm, np.arange(len(t))]
+
+        return self._refine(func, arm, star, time[step, 0], time[step + 1, 0])
+
+    def _refine(self, func, arm, star, left, right):
+        if not len(arm):
+            return PopulationCrossings.empty()
+
+        crossing_time = find_roots(func, arm, left, right, self.tolerance)
+        direction = np.where(func(np.arange(len(arm)), arm, right) >= 0, 1, -1)
+        distance = self.evaluate(crossing_time, star)[0]
+
+        return PopulationCrossings(crossing_time, arm, distance, direction, star)
@@ -0,0 +1,174 @@
+import threading
+
+import numpy as np
+
+from PyQt5.QtCore import QThread, QPointF, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPolygonF
+
+from .engine import SimulationEngine
+from .config import ConfigError
+
+
+# colors of the four logarithmic arms, as in SystemLogarithmicSpirals
+ARM_COLORS = (Qt.yellow, Qt.black, Qt.red, Qt.blue)
+
+
+class Preview:
+
+    def __init__(self, generation: int, statistics: dict = None, image=None, error: str = None):
+        # number of the submit() it answers
+        self.generation = generation
+        self.statistics = statistics
+        # QImage of the sun distance and the arm radii against time
+        self.image = image
+        self.error = error
+
+
+def preview_statistics(result, t_start: float, t_end: float):
+    visits = result.log_band_visits
+    # open stays are cut at the ends of the timeline
+    entry = np.where(np.isnan(visits.entry), t_start, visits.entry)
+    exit = np.where(np.isnan(visits.exit), t_end, visits.exit)
+    residence = exit - entry
+
+    return {
+        'arch_count': len(result.arch_crossings),
+        'log_count': len(result.log_crossings),
+        'band_visits': len(visits),
+        'band_fraction': float(np.sum(residence) / (t_end - t_start)) if t_end > t_start else 0.0,
+        'band_residence': float(np.mean(residence)) if len(residence) else 0.0,
+    }
+
+
+def _polygon(x, y):
+    # QPolygonF filled through a numpy view of its storage
+    polygon = QPolygonF()
+    if not len(x):
+        # data() of an empty polygon may be null
+        return polygon
+    polygon.fill(QPointF(), len(x))
+
+    pointer = polygon.data()
+    pointer.setsize(len(x) * 2 * np.dtype(np.float64).itemsize)
+    points = np.frombuffer(pointer, dtype=np.float64).reshape(len(x), 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
+
+
+def preview_image(result, width: int, height: int, y_max: float = 16):
+    # thumbnail of the graph of IntersectionsManager, time grows to the
+    # left; QImage and not QPixmap, it is drawn off the GUI thread
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    if len(result) < 2:
+        return image
+
+    time = result.time
+    t_start, t_end = time[0], time[-1]
+    x = (t_end - time) / (t_end - t_start) * (width - 1)
+
+    def to_y(distance):
+        # clipped far outside the image, the radii grow exponentially
+        return np.clip((1 - distance / y_max) * (height - 1), -height, 2 * height)
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    for radii, color in zip(result.log_spirals_radii, ARM_COLORS):
+        painter.setPen(QPen(QColor(color), 1))
+        painter.drawPolyline(_polygon(x, to_y(radii)))
+
+    painter.setPen(QPen(Qt.darkGray, 2))
+    painter.drawPolyline(_polygon(x, to_y(result.sun_distance)))
+
+    # crossings as marks on the sun curve
+    for crossings, color in ((result.arch_crossings, Qt.blue),
+                             (result.log_crossings, Qt.red)):
+        crossing_x = (t_end - crossings.time) / (t_end - t_start) * (width - 1)
+        painter.setPen(QPen(QColor(color), 4, cap=Qt.RoundCap))
+        painter.drawPoints(_polygon(crossing_x, to_y(crossings.distance)))
+
+    painter.setPen(Qt.black)
+    painter.drawRect(QRectF(0, 0, width - 1, height - 1))
+    painter.end()
+    return image
+
+
+class PreviewWorker(QThread):
+
+    # Preview of the latest submit()
+    preview_ready = pyqtSignal(object)
+
+    def __init__(self,
+                 t_end: float = 1000,
+                 step: float = 0.5,
+                 size=(360, 180),
+                 parent=None):
+
+        super().__init__(parent)
+
+        self.t_start = 0
+        self.t_end = t_end
+        self.step = step
+        self.size = size
+
+        self._condition = threading.Condition()
+        self._job = None
+        # a job is stale once a newer one is submitted or cancel() is called
+        self.generation = 0
+
+    def submit(self, parameters: dict):
+        # parameters are copied, the dialog goes on editing its dicts
+        parameters = {group: {name: dict(config) for name, config in values.items()}
+                      for group, values in parameters.items()}
+
+        with self._condition:
+            self.generation += 1
+            self._job = (self.generation, parameters)
+            self._condition.notify()
+        return self.generation
+
+    def cancel(self):
+        with self._condition:
+            self.generation += 1
+            self._job = None
+
+    def is_stale(self, generation: int):
+        return generation != self.generation
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            with self._condition:
+                if self._job is None:
+                    self._condition.wait(0.1)
+                job, self._job = self._job, None
+
+            if job is not None:
+                preview = self.compute(*job)
+                if preview is not None:
+                    self.preview_ready.emit(preview)
+
+    def compute(self, generation: int, parameters: dict):
+        # None when the job went stale, checked between the stages
+        try:
+            engine = SimulationEngine(parameters)
+        except ConfigError as error:
+            return Preview(generation, error=str(error))
+
+        result = engine.run(self.t_start, self.t_end, self.step)
+        if self.is_stale(generation):
+            return None
+
+        statistics = preview_statistics(result, self.t_start, self.t_end)
+        image = preview_image(result, *self.size)
+        if self.is_stale(generation):
+            return None
+
+        return Preview(generation, statistics, image)
+
+    def shutdown(self):
+        self.requestInterruption()
+        with self._condition:
+            self._condition.notify()
+        self.wait()
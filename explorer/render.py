@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from .engine import timeline
+
+
+# kpk at pixels of the scene, as in launch.py
+SCALE = 25
+
+_application = None
+_explorer = None
+_options = None
+
+
+def _init_worker(parameters: dict, options: dict):
+    # every worker has its own offscreen QApplication and explorer
+    global _application, _explorer, _options
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5 import QtWidgets
+    from .widget import ExplorerWidget
+
+    _application = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    _explorer = ExplorerWidget(parameters, options['scale'], threaded=False)
+    _options = options
+
+
+def render_frame(explorer, time: float, width: int, height: int):
+    # QImage of the scene at time, the whole grid fitted into width x height
+    from PyQt5.QtCore import QRectF, Qt
+    from PyQt5.QtGui import QImage, QPainter
+
+    explorer.apply_state(explorer.engine.evaluate([time]))
+
+    image = QImage(width, height, QImage.Format_RGB888)
+    image.fill(Qt.white)
+
+    # the scene is square, centered in the frame
+    source = explorer.scene.sceneRect()
+    side = min(width, height)
+    target = QRectF((width - side) / 2, (height - side) / 2, side, side)
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    explorer.scene.render(painter, target, source)
+    painter.setPen(Qt.black)
+    painter.drawText(QRectF(image.rect()).adjusted(10, 10, -10, -10),
+                     Qt.AlignLeft | Qt.AlignTop,
+                     '{:.1f} млн. лет'.format(time))
+    painter.end()
+    return image
+
+
+def image_bytes(image):
+    # rgb24 pixels of a Format_RGB888 image without the row padding
+    width, height = image.width(), image.height()
+    pointer = image.constBits()
+    pointer.setsize(image.bytesPerLine() * height)
+    rows = np.frombuffer(pointer, np.uint8).reshape(height, image.bytesPerLine())
+    return rows[:, :width * 3].tobytes()
+
+
+def _render_task(task):
+    index, time = task
+    image = render_frame(_explorer, time, _options['width'], _options['height'])
+
+    output = _options['output']
+    if _options['format'] == 'png':
+        image.save(os.path.join(output, 'frame_{:06d}.png'.format(index)))
+        return index, None
+    return index, image_bytes(image)
+
+
+def export_frames(parameters: dict,
+                  times,
+                  output: str,
+                  width: int = 1280,
+                  height: int = 720,
+                  frame_format: str = 'png',
+                  scale: int = SCALE,
+                  processes: int = None,
+                  chunksize: int = 8):
+    # 'png': numbered frames written by the workers into the directory
+    # output; 'raw': rgb24 frames in order into the file output, '-' for
+    # stdout, e.g. for ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i -
+    if frame_format == 'png':
+        os.makedirs(output, exist_ok=True)
+
+    options = {'width': width, 'height': height, 'format': frame_format,
+               'scale': scale, 'output': output}
+    tasks = list(enumerate(np.asarray(times, dtype=float).tolist()))
+
+    stream = None
+    if frame_format == 'raw':
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+
+    # Qt must not be forked once it is initialized
+    context = multiprocessing.get_context('spawn')
+    processes = processes or os.cpu_count() or 1
+    try:
+        with context.Pool(processes, _init_worker, (parameters, options)) as pool:
+            for index, data in pool.imap(_render_task, tasks, chunksize):
+                if stream is not None:
+                    stream.write(data)
+                yield index
+    finally:
+        if stream is not None and stream is not sys.stdout.buffer:
+            stream.close()
+
+
+def parse_size(text: str):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog='python -m explorer.render',
+                                     description='Offscreen frames of the galaxy model')
+    parser.add_argument('parameters', help='parameters json')
+    parser.add_argument('output', help='png directory, or a raw rgb24 file, - for stdout')
+    parser.add_argument('--format', choices=('png', 'raw'), default='png')
+    parser.add_argument('--t-start', type=float, default=0)
+    parser.add_argument('--t-end', type=float, default=1000)
+    parser.add_argument('--step', type=float, default=0.5,
+                        help='mln. years between frames')
+    parser.add_argument('--size', type=parse_size, default=(1280, 720), metavar='WxH')
+    parser.add_argument('--scale', type=int, default=SCALE, help='pixels per kpk of the scene')
+    parser.add_argument('--processes', type=int, default=None)
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+
+    with open(args.parameters, 'r') as f:
+        parameters = json.load(f)
+
+    times = timeline(args.t_start, args.t_end, args.step)
+    width, height = args.size
+
+    frames = export_frames(parameters, times, args.output, width, height,
+                           args.format, args.scale, args.processes)
+    for count, index in enumerate(frames, 1):
+        if count % 100 == 0 or count == len(times):
+            print('{}/{} frames'.format(count, len(times)), file=sys.stderr)
+
+    if args.format == 'raw':
+        print('ffmpeg -f rawvideo -pix_fmt rgb24 -s {}x{} -i {} video.mp4'.format(
+            width, height, args.output), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
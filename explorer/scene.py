@@ -1,5 +1,17 @@
+import math
+
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QPointF
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QPen
+
+from .graphical_items.spirals import radial_range
+
+
+# grid steps to choose from, kpk
+GRID_STEPS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5)
+# smallest distance between two grid circles, device pixels
+MIN_GRID_SPACING = 20
+
 
 class SceneWithGrid(QtWidgets.QGraphicsScene):
 
@@ -9,40 +21,87 @@ class SceneWithGrid(QtWidgets.QGraphicsScene):
         self.count_marks = 17
         self.center = QPointF(0, 0)
 
+        # the grid is painted as the background, only where it is exposed
+        # and with a step that follows the zoom of the view
+        self.pen = QPen(Qt.black)
+        self.pen.setCosmetic(True)
+
         self.draw()
 
+    def radius(self):
+        # radius of the outer grid circle, pixels
+        return self.scale * self.count_marks
+
     def draw(self):
-        super().clear()
-        self.add_grid()
-        self.add_axis()
+        radius = self.radius()
+        self.setSceneRect(QRectF(-radius, -radius, 2 * radius, 2 * radius))
+        self.update()
+
+    def grid_step(self, lod: float):
+        # kpk between the circles drawn at the level of detail lod
+        for step in GRID_STEPS:
+            if step * self.scale * lod >= MIN_GRID_SPACING:
+                return step
+        return GRID_STEPS[-1]
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+
+        lod = QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            painter.worldTransform())
+        radius = self.radius()
 
-    def add_grid(self):
-        for i in range(1, self.count_marks + 1):
-            circle = self._create_cirlce(i * self.scale)
-            self.addItem(circle)
+        painter.save()
+        painter.setPen(self.pen)
+        painter.setBrush(Qt.NoBrush)
 
-    def _create_cirlce(self, radius: float):
-        circle = QtWidgets.QGraphicsEllipseItem()
-        circle.setRect(0, 0, 2 * radius, 2 * radius)
-        circle.setPos(-radius, -radius)
+        # only the circles that cross the exposed rect
+        r_min, r_max = radial_range(rect, self.center)
+        step = self.grid_step(lod) * self.scale
+        first = max(int(math.ceil(r_min / step)), 1)
+        last = int(math.floor(min(r_max, radius) / step))
+        span = self._angular_span(rect)
+        for i in range(first, last + 1):
+            r = i * step
+            if span is None:
+                painter.drawEllipse(self.center, r, r)
+            else:
+                # only the visible arc, a whole circle many times the size
+                # of the viewport is expensive to stroke
+                circle = QRectF(self.center.x() - r, self.center.y() - r, 2 * r, 2 * r)
+                start, length = span
+                painter.drawArc(circle, int(start * 16), int(math.ceil(length * 16)))
 
-        return circle
+        self._draw_axis(painter, rect, radius)
+        painter.restore()
 
-    def add_axis(self):
-        line_length = self.scale * self.count_marks
+    def _angular_span(self, rect):
+        # (start, span) in degrees, counterclockwise on the screen, of the
+        # directions from the center to rect, None when rect holds the center
+        if rect.contains(self.center):
+            return None
 
-        x_min, x_max = -line_length, line_length
-        y = self.center.y()
-        line_x = QtWidgets.QGraphicsLineItem()
-        line_x.setLine(x_min, y, x_max, y)
+        x, y = self.center.x(), self.center.y()
+        middle = math.atan2(y - rect.center().y(), rect.center().x() - x)
+        angles = []
+        for corner in (rect.topLeft(), rect.topRight(), rect.bottomLeft(), rect.bottomRight()):
+            angle = math.atan2(y - corner.y(), corner.x() - x)
+            # unwrapped around the direction to the middle of rect
+            angles.append(middle + math.remainder(angle - middle, 2 * math.pi))
 
-        y_min, y_max = -line_length, line_length
-        x = self.center.x()
-        line_y = QtWidgets.QGraphicsLineItem()
-        line_y.setLine(x, y_min, x, y_max)
+        start, end = min(angles), max(angles)
+        return math.degrees(start) - 1, math.degrees(end - start) + 2
 
-        self.addItem(line_x)
-        self.addItem(line_y)
+    def _draw_axis(self, painter, rect, radius: float):
+        x, y = self.center.x(), self.center.y()
+
+        x_min, x_max = max(x - radius, rect.left()), min(x + radius, rect.right())
+        if rect.top() <= y <= rect.bottom() and x_min < x_max:
+            painter.drawLine(QPointF(x_min, y), QPointF(x_max, y))
+
+        y_min, y_max = max(y - radius, rect.top()), min(y + radius, rect.bottom())
+        if rect.left() <= x <= rect.right() and y_min < y_max:
+            painter.drawLine(QPointF(x, y_min), QPointF(x, y_max))
 
     def set_scale(self, scale: int):
         self.scale = scale
@@ -51,7 +110,8 @@ class SceneWithGrid(QtWidgets.QGraphicsScene):
     def set_center(self, center: QPointF):
         if isinstance(center, QPointF):
             self.center = center
-            sefl.draw()
+            self.draw()
 
     def clear(self):
+        super().clear()
         self.draw()
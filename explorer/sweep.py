@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from .engine import SimulationEngine
+from .cache import ResultCache
+
+
+def resolve_key(parameters: dict, key: str):
+    # 'group.key' or a bare key that exists in exactly one group
+    if '.' in key:
+        group, name = key.split('.', 1)
+        if name not in parameters.get(group, {}):
+            raise KeyError('Unknown parameter {}'.format(key))
+        return group, name
+
+    groups = [group for group, values in parameters.items() if key in values]
+    if not groups:
+        raise KeyError('Unknown parameter {}'.format(key))
+    if len(groups) > 1:
+        raise KeyError('Parameter {} must be given as group.{}'.format(key, key))
+    return groups[0], key
+
+
+def apply_overrides(parameters: dict, overrides: dict):
+    new_parameters = {group: {name: dict(config) for name, config in values.items()}
+                      for group, values in parameters.items()}
+
+    for key, value in overrides.items():
+        group, name = resolve_key(parameters, key)
+        new_parameters[group][name]['value'] = value
+
+    return new_parameters
+
+
+def expand_grid(grid: dict):
+    keys = list(grid)
+    for values in itertools.product(*(grid[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+def summary(engine, t_start: float, t_end: float, step: float):
+    result = engine.run(t_start, t_end, step)
+
+    row = {}
+    for family, crossings in (('arch', result.arch_crossings),
+                              ('log', result.log_crossings)):
+        row['{}_count'.format(family)] = len(crossings)
+        row['{}_times'.format(family)] = crossings.time.tolist()
+        row['{}_arms'.format(family)] = crossings.arm.tolist()
+        # time between consecutive crossings of any arm of the family, the
+        # time spent inside the arms is log_band_residence
+        row['{}_crossing_interval'.format(family)] = np.diff(crossings.time).tolist()
+
+    # stays inside the width wide bands of the logarithmic arms
+    visits = result.log_band_visits
+    row['log_band_arms'] = visits.arm.tolist()
+    row['log_band_residence'] = [None if np.isnan(duration) else duration
+                                 for duration in visits.duration.tolist()]
+
+    return row
+
+
+_base_parameters = None
+_cache = None
+
+
+def _init_worker(parameters: dict, cache_dir: str = None):
+    global _base_parameters, _cache
+    _base_parameters = parameters
+    _cache = ResultCache(cache_dir) if cache_dir else None
+
+
+def _run_task(task):
+    index, overrides, t_start, t_end, step = task
+
+    engine = SimulationEngine(apply_overrides(_base_parameters, overrides), cache=_cache)
+    row = {'index': index, 'parameters': overrides}
+    row.update(summary(engine, t_start, t_end, step))
+    return row
+
+
+def sweep(parameters: dict,
+          parameters_sets,
+          t_start: float = 0,
+          t_end: float = 1000,
+          step: float = 0.5,
+          processes: int = None,
+          chunksize: int = None,
+          cache_dir: str = None):
+    # yields one row per parameters set as soon as it is computed,
+    # rows carry the position of their set in 'index'; runs already in
+    # the result cache at cache_dir are not recomputed
+    parameters_sets = list(parameters_sets)
+    # unknown keys are reported before any worker starts
+    for key in {key for overrides in parameters_sets for key in overrides}:
+        resolve_key(parameters, key)
+
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(parameters_sets) // (processes * 16))
+
+    tasks = ((index, overrides, t_start, t_end, step)
+             for index, overrides in enumerate(parameters_sets))
+
+    if processes == 1:
+        _init_worker(parameters, cache_dir)
+        for task in tasks:
+            yield _run_task(task)
+        return
+
+    with multiprocessing.Pool(processes, _init_worker, (parameters, cache_dir)) as pool:
+        for row in pool.imap_unordered(_run_task, tasks, chunksize):
+            yield row
+
+
+def parse_grid_values(text: str):
+    # 'start:stop:count' for a linear range, otherwise comma separated values
+    if ':' in text:
+        start, stop, count = text.split(':')
+        return np.linspace(float(start), float(stop), int(count)).tolist()
+    return [float(value) for value in text.split(',')]
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog='python -m explorer.sweep',
+                                     description='Parameter sweep of the galaxy model')
+    parser.add_argument('parameters', help='parameters json')
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=VALUES',
+                        help='eccentricity=0.3,0.36 or log_spirals.period=150:250:11')
+    parser.add_argument('--sets', help='json list of parameters overrides')
+    parser.add_argument('--t-start', type=float, default=0)
+    parser.add_argument('--t-end', type=float, default=1000)
+    parser.add_argument('--step', type=float, default=0.5)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', help='json lines file, stdout by default')
+    parser.add_argument('--cache', help='result cache directory')
+    return parser
+
+
+def main(argv=None):
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    with open(args.parameters, 'r') as f:
+        parameters = json.load(f)
+
+    parameters_sets = []
+    if args.sets:
+        with open(args.sets, 'r') as f:
+            parameters_sets.extend(json.load(f))
+    if args.grid:
+        grid = {}
+        for item in args.grid:
+            key, separator, values = item.partition('=')
+            try:
+                if not separator:
+                    raise ValueError(item)
+                resolve_key(parameters, key)
+                grid[key] = parse_grid_values(values)
+            except KeyError as error:
+                parser.error('--grid {}: {}'.format(item, error.args[0]))
+            except ValueError:
+                parser.error('--grid {}: expected KEY=start:stop:count '
+                             'or KEY=comma separated numbers'.format(item))
+        parameters_sets.extend(expand_grid(grid))
+    if not parameters_sets:
+        parameters_sets.append({})
+    for overrides in parameters_sets:
+        for key in overrides:
+            try:
+                resolve_key(parameters, key)
+            except KeyError as error:
+                parser.error(error.args[0])
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        rows = sweep(parameters, parameters_sets,
+                     args.t_start, args.t_end, args.step, args.processes,
+                     cache_dir=args.cache)
+        for row in rows:
+            output.write(json.dumps(row) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
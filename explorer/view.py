@@ -0,0 +1,42 @@
+from PyQt5 import QtWidgets
+
+
+class ExplorerView(QtWidgets.QGraphicsView):
+
+    # limits of the zoom relative to the initial scale
+    MIN_ZOOM = 0.1
+    MAX_ZOOM = 1000
+    # zoom factor of one wheel notch
+    ZOOM_STEP = 1.25
+
+    def __init__(self, scene, profiler=None, parent=None):
+        super().__init__(scene, parent)
+        self.profiler = profiler
+
+        # zoom with the wheel around the cursor, pan by dragging
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
+
+    def zoom(self):
+        return self.transform().m11()
+
+    def wheelEvent(self, event):
+        notches = event.angleDelta().y() / 120
+        if not notches:
+            return super().wheelEvent(event)
+
+        zoom = self.zoom()
+        factor = self.ZOOM_STEP ** notches
+        factor = min(max(zoom * factor, self.MIN_ZOOM), self.MAX_ZOOM) / zoom
+        self.scale(factor, factor)
+        event.accept()
+
+    def reset_zoom(self):
+        self.resetTransform()
+
+    def paintEvent(self, event):
+        if self.profiler is None:
+            return super().paintEvent(event)
+
+        with self.profiler.stage('paint'):
+            super().paintEvent(event)
@@ -1,29 +1,46 @@
-import math
-from collections import defaultdict
-from array import array
+import contextlib
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QBasicTimer, QPointF, pyqtSlot
+from PyQt5.QtCore import QBasicTimer, Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QPainter
 
 from .graphical_items.orbit import EllipticalOrbitItem
-from .laws_motions import EllipticalKeplersMotion
-from .laws_motions import CircularMotion
+from .engine import SimulationEngine
+from .population import PopulationEngine
+from .config import compile_parameters
+from .clock import SimulationClock
+from .worker import SimulationWorker
+from .export import TrajectoryWriter
+from .instrumentation import FrameProfiler
+from .view import ExplorerView
 
 from .scene import SceneWithGrid
 from .intersections_manager import IntersectionsManager
 
 from .graphical_items.spirals import SystemArchimedeanSpirals
 from .graphical_items.spirals import SystemLogarithmicSpirals
+from .graphical_items.population import StarsItem
 
 
 class ExplorerWidget(QtWidgets.QWidget):
 
-    def __init__(self, parameters: dict, scale: int, parent=None):
+    recording_changed = pyqtSignal(bool)
+
+    def __init__(self,
+                 parameters: dict,
+                 scale: int,
+                 parent=None,
+                 history_length: int = None,
+                 threaded: bool = True,
+                 cache=None):
+
         super().__init__(parent=parent)
 
         self.parameters = parameters
         self.scale = scale
+        self.history_length = history_length
+        # ResultCache of the runs behind seek and parameter changes
+        self.cache = cache
 
         fps = 60
         # msec at sec
@@ -33,13 +50,25 @@ class ExplorerWidget(QtWidgets.QWidget):
 
         self.RUN = False
 
-        self.time = 0
-        self.time_interval = 0.5
+        self.clock = SimulationClock(time_interval=0.5, frame_rate=fps)
+        # initial range of the timeline slider, mln. years
+        self.horizon = 10000
+
+        self.writer = None
+        self.population = None
+        self._manager = None
+        self.profiler = FrameProfiler()
+
+        # physics runs on the worker, the GUI thread only renders its
+        # latest state; without it run() steps on the GUI thread
+        self.worker = None
+        if threaded:
+            self.worker = SimulationWorker(self.clock, self._simulate)
 
         self.scene = SceneWithGrid()
         self.scene.set_scale(scale)
 
-        self.view = QtWidgets.QGraphicsView(self.scene)
+        self.view = ExplorerView(self.scene, self.profiler)
         self.view.setRenderHint(QPainter.Antialiasing)
 
         self.init_ui()
@@ -47,128 +76,320 @@ class ExplorerWidget(QtWidgets.QWidget):
 
         self.restart()
 
+        if self.worker is not None:
+            self.worker.start()
+
+    @property
+    def time(self):
+        return self.clock.time
+
+    @property
+    def time_interval(self):
+        return self.clock.time_interval
+
     def init_ui(self):
+        self.timeline_slider = QtWidgets.QSlider(Qt.Horizontal)
+        self.timeline_slider.setRange(0, self.horizon)
+        self.timeline_slider.sliderMoved[int].connect(self.seek)
+
+        self.time_label = QtWidgets.QLabel()
+
+        timeline_box = QtWidgets.QHBoxLayout()
+        timeline_box.addWidget(self.timeline_slider)
+        timeline_box.addWidget(self.time_label)
+
         vbox = QtWidgets.QVBoxLayout()
         vbox.addWidget(self.view)
+        vbox.addLayout(timeline_box)
         self.setLayout(vbox)
 
     def settings_items(self):
         self.scene.clear()
 
+        self.config = compile_parameters(self.parameters)
+        self.engine = SimulationEngine(self.config, cache=self.cache)
+
         self._settings_orbit()
         self._settings_arch_spirals()
         self._settings_log_spirals()
+        self._settings_population()
 
-        self._manager = IntersectionsManager(self.parameters, self)
+        # the manager and its graph outlive parameter changes
+        if self._manager is None:
+            self._manager = IntersectionsManager(self.parameters,
+                                                 self.engine,
+                                                 self,
+                                                 self.history_length)
+        else:
+            self._manager.set_engine(self.parameters, self.engine)
 
     def _settings_orbit(self):
-        eccentricity = self.parameters['orbit']['eccentricity']['value']
-        s_major_axis = self.parameters['orbit']['s_major_axis']['value']
-        self.orbit = EllipticalOrbitItem(eccentricity,
-                                         s_major_axis * self.scale)
-
-        sun_period = self.parameters['orbit']['sun_period']['value']
-        sun_rotation = math.radians(self.parameters['orbit']['sun_rotation']['value'])
-        self.sun_contoller = EllipticalKeplersMotion(sun_period,
-                                                     s_major_axis,
-                                                     eccentricity,
-                                                     sun_rotation)
-
-        orbit_period = self.parameters['orbit']['orbit_period']['value']
-        orbit_rotation = math.radians(self.parameters['orbit']['orbit_rotation']['value'])
-        self.orbit_controller = CircularMotion(orbit_period, orbit_rotation)
+        orbit = self.config.orbit
+        self.orbit = EllipticalOrbitItem(orbit.eccentricity,
+                                         orbit.s_major_axis * self.scale)
+
+        self.sun_contoller = self.engine.sun_controller
+        self.orbit_controller = self.engine.orbit_controller
 
         self.scene.addItem(self.orbit)
 
     def _settings_arch_spirals(self):
-        ro = self.parameters['arch_spirals']['ro']['value']
+        ro = self.config.arch_spirals.ro
         radius_center = self.orbit.radius_center()
         self.arch_spirals = SystemArchimedeanSpirals(ro * self.scale,
                                                      radius_center)
-
-        period = self.parameters['arch_spirals']['period']['value']
-        rotation = math.radians(self.parameters['arch_spirals']['rotation']['value'])
-        self.arch_spirals_controller = CircularMotion(period, rotation)
+        self.arch_spirals_controller = self.engine.arch_spirals_controller
 
         for spiral in self.arch_spirals.items():
+            spiral.set_size(*self._spirals_size())
             self.scene.addItem(spiral)
 
     def _settings_log_spirals(self):
-        alpha = self.parameters['log_spirals']['alpha']['value']
-        r0 = self.parameters['log_spirals']['r0']['value'] * self.scale
-        width = self.parameters['log_spirals']['width']['value'] * self.scale
+        log_spirals = self.config.log_spirals
+        alpha = log_spirals.alpha
+        r0 = log_spirals.r0 * self.scale
+        width = log_spirals.width * self.scale
         self.log_spirals = SystemLogarithmicSpirals(alpha, r0, width)
-
-        period = self.parameters['log_spirals']['period']['value']
-        rotation = math.radians(self.parameters['log_spirals']['rotation']['value'])
-        self.log_spirals_controller = CircularMotion(period, rotation)
+        self.log_spirals_controller = self.engine.log_spirals_controller
 
         for spiral in self.log_spirals.items():
+            spiral.set_size(*self._spirals_size())
             self.scene.addItem(spiral)
 
+    def _spirals_size(self):
+        # the spirals are drawn up to the outer grid circle
+        size = 2 * self.scene.radius()
+        return size, size
+
+    def _settings_population(self):
+        self.stars = StarsItem()
+        self.scene.addItem(self.stars)
+
+        self._settings_population_engine()
+
+    def set_population(self, population):
+        # stars drawn along with the sun, None removes them
+        running = self.RUN
+        self.stop()
+
+        self.population = population
+        self._settings_population_engine()
+
+        self.apply_state(self._evaluate([self.time]))
+        if running:
+            self.start()
+
+    def _settings_population_engine(self):
+        lock = contextlib.nullcontext()
+        if self.worker is not None:
+            lock = self.worker.lock
+
+        with lock:
+            self.population_engine = None
+            if self.population is not None:
+                self.population_engine = PopulationEngine(self.config, self.population)
+
     def timerEvent(self, event):
-        self.run()
+        if self.worker is None:
+            self.run()
+            return
+
+        state = self.worker.take_state()
+        if state is not None:
+            self.apply_state(state)
 
     def run(self):
+        # one frame on the calling thread, used when there is no worker
         if self.RUN:
-            self._orbit_motion()
-            self._arch_spirals_motion()
-            self._log_spirals_motion()
-            self._update_manager()
-
-            self.time += self.time_interval
+            times = self.clock.advance_frames(1)
+            if len(times):
+                self.apply_state(self._simulate(times))
+
+    def _simulate(self, times):
+        with self.profiler.stage('engine'):
+            result = self._evaluate(times)
+
+        with self.profiler.stage('manager'):
+            crossings = self._manager.update_batch(result.time,
+                                                   result.sun_distance,
+                                                   result.sun_galactic_rotation)
+        result.arch_crossings, result.log_crossings, result.log_band_crossings = crossings
+
+        if self.writer is not None:
+            self.writer.write(result)
+        return result
+
+    def _evaluate(self, times):
+        result = self.engine.evaluate(times)
+        if self.population_engine is not None:
+            result.star_positions = self.population_engine.positions(result.time[-1])
+        return result
+
+    def apply_state(self, result, index: int = -1):
+        with self.profiler.stage('orbit'):
+            self._orbit_motion(result, index)
+        with self.profiler.stage('arch_spirals'):
+            self._arch_spirals_motion(result, index)
+        with self.profiler.stage('log_spirals'):
+            self._log_spirals_motion(result, index)
+        if result.star_positions is not None:
+            with self.profiler.stage('stars'):
+                self._stars_motion(result)
+        elif self.population is None:
+            self.stars.clear()
+        self._timeline_motion(result.time[index])
+
+        self.profiler.frame()
+
+    def statistics(self):
+        return {
+            'fps': self.profiler.fps() if self.RUN else 0.0,
+            'target_fps': self.clock.frame_rate,
+            'stages': self.profiler.timings(),
+            'history_bytes': self._manager.nbytes,
+        }
+
+    def _timeline_motion(self, time: float):
+        self.time_label.setText('{:.1f} млн. лет'.format(time))
+
+        if self.timeline_slider.isSliderDown():
+            return
+        if time > self.timeline_slider.maximum():
+            self.timeline_slider.setMaximum(int(time))
+        self.timeline_slider.blockSignals(True)
+        self.timeline_slider.setValue(int(time))
+        self.timeline_slider.blockSignals(False)
+
+    @pyqtSlot(int)
+    @pyqtSlot(float)
+    def seek(self, time: float):
+        running = self.RUN
+        self.stop()
+        self.stop_recording()
+
+        self.clock.reset(time)
+        self._load_history()
+
+        if running:
+            self.start()
+
+    def _load_history(self):
+        # the history comes from a cached run, not from replaying the clock
+        table = self.engine.table(self.time, self.time_interval)
+        self._manager.load(table, self.time)
+        self.apply_state(self._evaluate([self.time]))
 
     @pyqtSlot()
     def restart(self):
-        self.time = 0
-        self.RUN = False
+        self.stop()
+        self.stop_recording()
+        self.clock.reset()
 
-        self._orbit_motion()
-        self._arch_spirals_motion()
-        self._log_spirals_motion()
+        self.apply_state(self._evaluate([self.time]))
 
         self._manager.restart()
 
-    def _orbit_motion(self):
-        sun_rotation = self.sun_contoller.rotation(self.time)
-        sun_distance = self.sun_contoller.distance(self.time)
-
-        self.orbit.sun.set_rotation(sun_rotation)
-        self.orbit.sun.set_distance(sun_distance * self.scale)
+    def _orbit_motion(self, result, index: int):
+        self.orbit.sun.set_rotation(result.sun_rotation[index])
+        self.orbit.sun.set_distance(result.sun_distance[index] * self.scale)
 
-        orbit_rotation = self.orbit_controller.rotation(self.time)
-        self.orbit.set_rotation(orbit_rotation)
+        self.orbit.set_rotation(result.orbit_rotation[index])
 
-    def _arch_spirals_motion(self):
-        rotation = self.arch_spirals_controller.rotation(self.time)
-        self.arch_spirals.set_rotation(rotation)
+    def _arch_spirals_motion(self, result, index: int):
+        self.arch_spirals.set_rotation(result.arch_rotation[index])
 
-    def _log_spirals_motion(self):
-        rotation = self.log_spirals_controller.rotation(self.time)
-        self.log_spirals.set_rotation(rotation)
+    def _log_spirals_motion(self, result, index: int):
+        self.log_spirals.set_rotation(result.log_rotation[index])
 
-    def _update_manager(self):
-        start_sun_rotation = self.parameters['orbit']['sun_rotation']['value']
-        sun_rotation = self.sun_contoller.full_rotation(self.time)
-        orbit_rotation = self.orbit_controller.rotation(self.time)
-        sun_distance = self.sun_contoller.distance(self.time)
-
-        sun_rotation = sun_rotation + math.degrees(orbit_rotation) - 90
-        self._manager.update(self.time, sun_distance, sun_rotation)
+    def _stars_motion(self, result):
+        # only the last state carries the stars, scene y points down
+        x, y = result.star_positions
+        self.stars.set_positions(x * self.scale, -y * self.scale)
 
     @pyqtSlot(dict)
     def update_parameters(self, new_parameters: dict):
+        # only the groups that changed are rebuilt and the simulation goes
+        # on from the current time
+        running = self.RUN
+        self.stop()
+        # the recording was started with the previous parameters
+        self.stop_recording()
+
         self.parameters = new_parameters
-        self.settings_items()
-        self.restart()
+        changed = self.engine.update_config(new_parameters)
+        self.config = self.engine.config
+
+        if 'orbit' in changed:
+            self.scene.removeItem(self.orbit)
+            self._settings_orbit()
+        if 'arch_spirals' in changed:
+            self._remove_items(self.arch_spirals.items())
+            self._settings_arch_spirals()
+        if 'log_spirals' in changed:
+            self._remove_items(self.log_spirals.items())
+            self._settings_log_spirals()
+        if changed:
+            self._settings_population_engine()
+
+        self._manager.set_engine(self.parameters, self.engine)
+        if changed:
+            self._load_history()
+
+        if running:
+            self.start()
+
+    def _remove_items(self, items):
+        for item in items:
+            self.scene.removeItem(item)
 
     @pyqtSlot()
     def start(self):
         self.RUN = True
+        if self.worker is not None:
+            self.worker.resume()
 
     @pyqtSlot()
     def stop(self):
         self.RUN = False
+        if self.worker is not None:
+            self.worker.pause()
+
+    @pyqtSlot(float)
+    def set_speed(self, speed: float):
+        if self.worker is not None:
+            self.worker.set_speed(speed)
+        else:
+            self.clock.speed = speed
+
+    def start_recording(self, path: str):
+        # trajectory and crossings from now on are streamed to path
+        self.stop_recording()
+        self._set_writer(TrajectoryWriter(path, self.parameters))
+        self.recording_changed.emit(True)
+
+    def stop_recording(self):
+        writer = self._set_writer(None)
+        if writer is not None:
+            writer.close()
+            self.recording_changed.emit(False)
+
+    def _set_writer(self, writer):
+        lock = contextlib.nullcontext()
+        if self.worker is not None:
+            lock = self.worker.lock
+
+        with lock:
+            previous, self.writer = self.writer, writer
+        return previous
+
+    def shutdown(self):
+        if self.worker is not None:
+            self.worker.shutdown()
+        self.stop_recording()
+
+    @pyqtSlot()
+    def reset_zoom(self):
+        self.view.reset_zoom()
 
     @pyqtSlot()
     def show_graph(self):
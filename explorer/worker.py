@@ -0,0 +1,63 @@
+import time
+import threading
+
+from PyQt5.QtCore import QThread
+
+
+class SimulationWorker(QThread):
+
+    def __init__(self, clock, simulate, parent=None):
+        super().__init__(parent)
+
+        self.clock = clock
+        # simulate(times) -> state, runs on the worker thread
+        self.simulate = simulate
+
+        # held while a batch of substeps is simulated
+        self.lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        self.running = False
+        self._state = None
+
+    def run(self):
+        tick = 1 / self.clock.frame_rate
+        last = time.perf_counter()
+
+        while not self.isInterruptionRequested():
+            now = time.perf_counter()
+            with self.lock:
+                if self.running:
+                    times = self.clock.advance(now - last)
+                    if len(times):
+                        state = self.simulate(times)
+                        with self._state_lock:
+                            self._state = state
+            last = now
+
+            time.sleep(max(tick - (time.perf_counter() - now), 0))
+
+    def take_state(self):
+        # latest state or None, older states are dropped
+        with self._state_lock:
+            state, self._state = self._state, None
+        return state
+
+    def resume(self):
+        with self.lock:
+            self.running = True
+
+    def pause(self):
+        # returns once the batch in progress is finished
+        with self.lock:
+            self.running = False
+        with self._state_lock:
+            self._state = None
+
+    def set_speed(self, speed: float):
+        with self.lock:
+            self.clock.speed = speed
+
+    def shutdown(self):
+        self.requestInterruption()
+        self.wait()
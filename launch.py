@@ -1,85 +1,189 @@
 import sys
 import json
+import argparse
 
-from PyQt5 import QtWidgets
-from main_widget import MainWindow
+PARAMETERS = {
+    'orbit': {
+        's_major_axis': {
+            'value': 8.45,
+            'measure': 'kpk',
+        },
+        'eccentricity': {
+            'value': 0.36,
+            'measure': '',
+        },
+        'orbit_period': {
+            'value': 2000,
+            'measure': 'mln. years',
+        },
+        'sun_period': {
+            'value': 250,
+            'measure': 'mln. years',
+        },
+        'orbit_rotation': {
+            'value': -10,
+            'measure': 'degrees',
+        },
+        'sun_rotation': {
+            'value': 100,
+            'measure': 'degrees',
+        },
+    },
+    'log_spirals': {
+        'alpha': {
+            'value': 0.218,
+            'measure': '',
+        },
+        'r0': {
+            'value': 3,
+            'measure': 'kpk',
+        },
+        'period': {
+            'value': 200,
+            'measure': 'mln. years',
+        },
+        'rotation': {
+            'value': 45,
+            'measure': 'degrees',
+        },
+        'width': {
+            'value': 0.7,
+            'measure': 'kpk',
+        },
+    },
+
+    'arch_spirals': {
+        'ro': {
+            'value': 2.48,
+            'measure': '',
+        },
+        'V0': {
+            'value': 0.31164,
+            'measure': '',
+        },
+        'period': {
+            'value': 50,
+            'measure': 'mln. years',
+        },
+        'rotation': {
+            'value': 80,
+            'measure': 'degrees',
+        }
+    },
+}
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description='Galaxy model explorer')
+    parser.add_argument('parameters', nargs='?',
+                        help='parameters json, the built-in parameters by default')
+    parser.add_argument('--batch', action='store_true',
+                        help='compute the run without the window')
+    parser.add_argument('--t-start', type=float, default=0)
+    parser.add_argument('--t-end', type=float, default=1000,
+                        help='time horizon, mln. years')
+    parser.add_argument('--step', type=float, default=0.5,
+                        help='time step, mln. years')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='steps shrink only where the sun approaches an arm')
+    parser.add_argument('--max-step', type=float, default=10,
+                        help='largest adaptive step, mln. years')
+    parser.add_argument('--tolerance', type=float, default=1e-6,
+                        help='error on the crossing epochs, mln. years')
+    parser.add_argument('--no-trajectory', action='store_true',
+                        help='write the crossings only, json output only')
+    parser.add_argument('--output',
+                        help='json file or a trajectory directory, stdout by default')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='samples per chunk when streaming into a trajectory directory')
+    parser.add_argument('--cache',
+                        help='result cache directory, fixed step runs only')
+    return parser
+
+
+def run_batch(parameters: dict, args):
+    # no Qt is imported on this path
+    from explorer.engine import SimulationEngine
+    from explorer.adaptive import AdaptiveStepper
+    from explorer.export import TrajectoryWriter, result_to_dict
+    from explorer.cache import ResultCache
+
+    cache = ResultCache(args.cache) if args.cache else None
+    engine = SimulationEngine(parameters, args.tolerance, cache)
+    trajectory_dir = args.output and not args.output.endswith('.json')
+
+    if trajectory_dir and not args.adaptive:
+        # streamed chunk by chunk, any horizon fits in memory
+        with TrajectoryWriter(args.output, parameters) as writer:
+            for chunk in engine.stream(args.t_start, args.t_end, args.step, args.chunk_size):
+                writer.write(chunk)
+        return
+
+    if args.adaptive:
+        stepper = AdaptiveStepper(engine, args.tolerance, max_step=args.max_step)
+        result = stepper.run(args.t_start, args.t_end)
+    else:
+        result = engine.run(args.t_start, args.t_end, args.step)
+
+    if trajectory_dir:
+        with TrajectoryWriter(args.output, parameters) as writer:
+            writer.write(result)
+        return
+
+    data = result_to_dict(result, parameters, trajectory=not args.no_trajectory)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(data, output)
+        output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
 
-if __name__ == '__main__':
-    app = QtWidgets.QApplication(sys.argv)
-    parameters = {
-            'orbit': {
-                's_major_axis': {
-                    'value': 8.45,
-                    'measure': 'kpk',
-                },
-                'eccentricity': {
-                    'value': 0.36,
-                    'measure': '',
-                },
-                'orbit_period': {
-                    'value': 2000,
-                    'measure': 'mln. years',
-                },
-                'sun_period': {
-                    'value': 250,
-                    'measure': 'mln. years',
-                },
-                'orbit_rotation': {
-                    'value': -10,
-                    'measure': 'degrees',
-                },
-                'sun_rotation': {
-                    'value': 100,
-                    'measure': 'degrees',
-                },
-            },
-            'log_spirals': {
-                'alpha': {
-                    'value': 0.218,
-                    'measure': '',
-                },
-                'r0': {
-                    'value': 3,
-                    'measure': 'kpk',
-                },
-                'period': {
-                    'value': 200,
-                    'measure': 'mln. years',
-                },
-                'rotation': {
-                    'value': 45,
-                    'measure': 'degrees',
-                },
-                'width': {
-                    'value': 0.7,
-                    'measure': 'kpk',
-                },
-            },
-
-            'arch_spirals': {
-                'ro': {
-                    'value': 2.48,
-                    'measure': '',
-                },
-                'V0': {
-                    'value': 0.31164,
-                    'measure': '',
-                },
-                'period': {
-                    'value': 50,
-                    'measure': 'mln. years',
-                },
-                'rotation': {
-                    'value': 80,
-                    'measure': 'degrees',
-                }
-            },
-    }
+
+def run_gui(parameters: dict):
+    from PyQt5 import QtWidgets
+    from main_widget import MainWindow
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    # names the per-user directories, the result cache among them
+    app.setApplicationName('GalaxyModel')
 
     # kpk at pixels
     scale = 25
     window = MainWindow(parameters, scale)
     window.show()
 
-    sys.exit(app.exec_())
+    return app.exec_()
+
+
+def main(argv=None):
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.no_trajectory and args.output and not args.output.endswith('.json'):
+        parser.error('--no-trajectory applies to json output, '
+                     'a trajectory directory always holds the trajectory')
+
+    from explorer.config import ConfigError, compile_parameters
 
+    parameters = PARAMETERS
+    if args.parameters:
+        with open(args.parameters, 'r') as f:
+            parameters = json.load(f)
+        # malformed files are rejected before the window or the run starts
+        try:
+            compile_parameters(parameters)
+        except ConfigError as error:
+            sys.exit(str(error))
+
+    if args.batch:
+        try:
+            run_batch(parameters, args)
+        except (ConfigError, FileExistsError) as error:
+            sys.exit(str(error))
+        return 0
+
+    return run_gui(parameters)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,29 +3,44 @@ import json
 
 from PyQt5 import QtWidgets
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import QSize
+from PyQt5.QtCore import QSize, QTimer, QStandardPaths
 
 from explorer.widget import ExplorerWidget
-from parameters_dialog import ParametersDialog
+from explorer.config import ConfigError, compile_parameters
+from explorer.population import sample_population
+from explorer.cache import ResultCache
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class MainWindow(QtWidgets.QMainWindow):
 
+    # stars sampled for the population mode
+    POPULATION_SIZE = 10000
+    # samples kept for the graph, 50 000 mln. years at the 0.5 substep;
+    # unbounded, the history grows by about 33 MB/s at x10000
+    HISTORY_LENGTH = 100000
+
     def __init__(self, parameters, scale, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.parameters = parameters
         self.scale = scale
-        self.explorer = ExplorerWidget(self.parameters, self.scale)
+        # runs of known parameter sets are reused across sessions
+        cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        self.cache = ResultCache(os.path.join(cache_dir, 'results'))
+
+        self.explorer = ExplorerWidget(self.parameters, self.scale,
+                                       history_length=self.HISTORY_LENGTH,
+                                       cache=self.cache)
 
-        self.parameters_dialog = ParametersDialog(self.parameters)
-        self.parameters_dialog.updated_parameters[dict].connect(self.explorer.update_parameters)
+        # built on the first open_parameters_dialog
+        self.parameters_dialog = None
 
         self.setCentralWidget(self.explorer)
 
         self.create_toolbar()
         self.create_menubar()
+        self.create_statusbar()
 
     def create_toolbar(self):
         toolbar = self.addToolBar('toolbar')
@@ -45,6 +60,14 @@ class MainWindow(QtWidgets.QMainWindow):
         stop_action.triggered.connect(self.explorer.stop)
         restart_action.triggered.connect(self.explorer.restart)
 
+        # simulation speed, substeps of 0.5 mln. years per frame
+        speed_box = QtWidgets.QComboBox()
+        for speed in (1, 10, 100, 1000, 10000):
+            speed_box.addItem('x{}'.format(speed), speed)
+        speed_box.currentIndexChanged[int].connect(
+            lambda index: self.explorer.set_speed(speed_box.itemData(index)))
+        toolbar.addWidget(speed_box)
+
     def create_menubar(self):
         menu = self.menuBar()
         menu.setNativeMenuBar(False)
@@ -60,17 +83,63 @@ class MainWindow(QtWidgets.QMainWindow):
         load_parameters = parameters_menu.addAction('Загрузить')
         load_parameters.triggered.connect(self.load_parameters)
 
+        view_menu = menu.addMenu('Вид')
+
+        reset_zoom = view_menu.addAction('Сбросить масштаб')
+        reset_zoom.triggered.connect(self.explorer.reset_zoom)
+
         plot_menu = menu.addMenu('График')
 
         show_plot = plot_menu.addAction('Показать')
         show_plot.triggered.connect(self.explorer.show_graph)
 
-        save_plot = plot_menu.addAction('Сохранить')
+        self.save_plot = plot_menu.addAction('Сохранить')
+        self.save_plot.setCheckable(True)
+        self.save_plot.triggered[bool].connect(self.save_plot_data)
+        self.explorer.recording_changed[bool].connect(self.save_plot.setChecked)
+
+        population_menu = menu.addMenu('Популяция')
+
+        show_population = population_menu.addAction('Показать')
+        show_population.setCheckable(True)
+        show_population.triggered[bool].connect(self.show_population)
+
+        profiler_menu = menu.addMenu('Профилирование')
+
+        save_trace = profiler_menu.addAction('Сохранить трассу')
+        save_trace.triggered.connect(self.save_trace)
 
     def create_statusbar(self):
-        pass
+        self.statistics_label = QtWidgets.QLabel()
+        self.statusBar().addPermanentWidget(self.statistics_label)
+
+        self.statistics_timer = QTimer(self)
+        self.statistics_timer.timeout.connect(self.update_statusbar)
+        self.statistics_timer.start(500)
+
+    def update_statusbar(self):
+        statistics = self.explorer.statistics()
+
+        parts = ['FPS {:.0f}/{}'.format(statistics['fps'], statistics['target_fps'])]
+        for stage, duration in statistics['stages'].items():
+            parts.append('{} {:.2f} мс'.format(stage, duration * 1000))
+        parts.append('история {:.1f} МБ'.format(statistics['history_bytes'] / 2 ** 20))
+
+        self.statistics_label.setText(' | '.join(parts))
+
+    def closeEvent(self, event):
+        self.explorer.shutdown()
+        if self.parameters_dialog is not None:
+            self.parameters_dialog.shutdown()
+        super().closeEvent(event)
 
     def open_parameters_dialog(self):
+        if self.parameters_dialog is None:
+            from parameters_dialog import ParametersDialog
+
+            self.parameters_dialog = ParametersDialog(self.explorer.parameters)
+            self.parameters_dialog.updated_parameters[dict].connect(self.explorer.update_parameters)
+
         self.parameters_dialog.show()
 
     def load_parameters(self):
@@ -81,9 +150,42 @@ class MainWindow(QtWidgets.QMainWindow):
         file_path = file_[0]
         if file_path and file_path.endswith('.json'):
             with open(file_path, 'r') as f:
-                new_parameters = json.load(f)
+                try:
+                    new_parameters = json.load(f)
+                    compile_parameters(new_parameters)
+                except (ValueError, ConfigError) as error:
+                    QtWidgets.QMessageBox.warning(self, 'Ошибка', str(error))
+                    return
                 self.explorer.update_parameters(new_parameters)
 
+    def save_plot_data(self, checked: bool):
+        if not checked:
+            self.explorer.stop_recording()
+            return
+
+        path = QtWidgets.QFileDialog.getExistingDirectory(parent=self,
+                                                          caption='Папка для записи')
+        try:
+            if path:
+                self.explorer.start_recording(path)
+                return
+        except OSError as error:
+            QtWidgets.QMessageBox.warning(self, 'Ошибка', str(error))
+        self.save_plot.setChecked(False)
+
+    def show_population(self, checked: bool):
+        population = None
+        if checked:
+            population = sample_population(self.explorer.parameters, self.POPULATION_SIZE)
+        self.explorer.set_population(population)
+
+    def save_trace(self):
+        file_ = QtWidgets.QFileDialog.getSaveFileName(parent=self,
+                                                      filter='*.csv;;*.json',
+                                                      initialFilter='trace.csv')
+        if file_[0]:
+            self.explorer.profiler.export(file_[0])
+
     def save_parameters(self):
         file_ = QtWidgets.QFileDialog.getSaveFileName(parent=self,
                                                       filter='*.json',
@@ -1,14 +1,20 @@
 from collections import defaultdict
 
-from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton
+from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QCheckBox
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QGroupBox
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QTimer
 
 from PyQt5 import QtCore
-from PyQt5.QtWidgets import QDialog
+from PyQt5.QtWidgets import QDialog, QMessageBox
+
+from explorer.config import ConfigError, compile_parameters
 
 
 class FieldParameter(QWidget):
 
+    value_changed = QtCore.pyqtSignal()
+
     def __init__(self, name: str, config: dict, *args, **kwargs):
         super().__init__()
 
@@ -44,6 +50,7 @@ class FieldParameter(QWidget):
             return
         else:
             self.config['value'] = value
+            self.value_changed.emit()
 
     def settings_ui(self):
         hbox = QHBoxLayout()
@@ -57,12 +64,14 @@ class GroupParameters(QGroupBox):
         super().__init__(title)
 
         self.parameters = parameters
+        self.fields = []
         self.settings_ui()
 
     def settings_ui(self):
         main_box = QVBoxLayout()
         for name, config in self.parameters.items():
             field = FieldParameter(name, config)
+            self.fields.append(field)
             main_box.addWidget(field)
         self.setLayout(main_box)
 
@@ -70,11 +79,21 @@ class ParametersDialog(QWidget):
 
     updated_parameters = QtCore.pyqtSignal(dict)
 
+    # msec without edits before the preview is recomputed
+    PREVIEW_DELAY = 250
+
     def __init__(self, parameters: dict, parent=None):
         QWidget.__init__(self, parent=parent)
 
         self.parameters = parameters.copy()
 
+        # started when the preview is first enabled
+        self.preview_worker = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.submit_preview)
+
         self.setWindowFlag(QtCore.Qt.Dialog)
         self.settings_ui()
 
@@ -84,10 +103,25 @@ class ParametersDialog(QWidget):
         parameters_groups_box = QHBoxLayout()
         for group, parameters_group in self.parameters.items():
             group_box = GroupParameters(group, parameters_group)
+            for field in group_box.fields:
+                field.value_changed.connect(self.schedule_preview)
             parameters_groups_box.addWidget(group_box)
 
         main_box.addLayout(parameters_groups_box)
 
+        self.preview_box = QCheckBox('Предпросмотр')
+        self.preview_box.toggled[bool].connect(self.set_preview)
+        main_box.addWidget(self.preview_box)
+
+        self.preview_label = QLabel()
+        self.statistics_label = QLabel()
+        preview_layout = QHBoxLayout()
+        preview_layout.addWidget(self.preview_label)
+        preview_layout.addWidget(self.statistics_label, alignment=QtCore.Qt.AlignTop)
+        main_box.addLayout(preview_layout)
+        self.preview_label.hide()
+        self.statistics_label.hide()
+
         buttons_box = QHBoxLayout()
 
         button_ok = QPushButton('Окей')
@@ -102,6 +136,77 @@ class ParametersDialog(QWidget):
         self.setLayout(main_box)
 
     def clicked_ok(self):
+        try:
+            compile_parameters(self.parameters)
+        except ConfigError as error:
+            QMessageBox.warning(self, 'Ошибка', str(error))
+            return
+
         self.updated_parameters.emit(self.parameters)
         self.close()
 
+    def set_preview(self, enabled: bool):
+        self.preview_label.setVisible(enabled)
+        self.statistics_label.setVisible(enabled)
+
+        if not enabled:
+            self.cancel_preview()
+            return
+
+        if self.preview_worker is None:
+            from explorer.preview import PreviewWorker
+
+            self.preview_worker = PreviewWorker()
+            self.preview_worker.preview_ready.connect(self.show_preview)
+            self.preview_worker.start()
+        self.submit_preview()
+
+    def schedule_preview(self):
+        # edits are debounced, a pending job is already stale
+        if self.preview_box.isChecked():
+            self.preview_worker.cancel()
+            self.preview_timer.start()
+
+    def submit_preview(self):
+        if self.preview_box.isChecked():
+            self.preview_worker.submit(self.parameters)
+
+    def cancel_preview(self):
+        self.preview_timer.stop()
+        if self.preview_worker is not None:
+            self.preview_worker.cancel()
+
+    def show_preview(self, preview):
+        # queued from the worker, a newer edit may have come meanwhile
+        if self.preview_worker.is_stale(preview.generation):
+            return
+
+        if preview.error is not None:
+            self.statistics_label.setText(preview.error)
+            return
+
+        statistics = preview.statistics
+        self.preview_label.setPixmap(QPixmap.fromImage(preview.image))
+        self.statistics_label.setText(
+            'Пересечения архимедовых рукавов: {}\n'
+            'Пересечения логарифмических рукавов: {}\n'
+            'Визиты в рукава: {}\n'
+            'Время в рукавах: {:.1%}\n'
+            'Средний визит: {:.1f} млн. лет'.format(statistics['arch_count'],
+                                                    statistics['log_count'],
+                                                    statistics['band_visits'],
+                                                    statistics['band_fraction'],
+                                                    statistics['band_residence']))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.submit_preview()
+
+    def closeEvent(self, event):
+        self.cancel_preview()
+        super().closeEvent(event)
+
+    def shutdown(self):
+        if self.preview_worker is not None:
+            self.preview_worker.shutdown()
+
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from launch import PARAMETERS
+
+
+@pytest.fixture
+def parameters():
+    # a copy, tests may edit the values
+    return {group: {name: dict(config) for name, config in values.items()}
+            for group, values in PARAMETERS.items()}
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,30 @@
+import numpy as np
+
+from explorer.adaptive import AdaptiveStepper
+from explorer.engine import SimulationEngine
+
+
+def test_adaptive_crossings_match_a_fine_step_run(parameters):
+    reference = SimulationEngine(parameters).run(0, 3000, 0.01)
+    stepper = AdaptiveStepper(SimulationEngine(parameters), tolerance=1e-6)
+    result = stepper.run(0, 3000)
+
+    # far fewer samples than the 0.5 mln. years substep
+    assert len(result) < 6001 / 3
+    for family in ('arch_crossings', 'log_crossings', 'log_band_crossings'):
+        crossings, expected = getattr(result, family), getattr(reference, family)
+        assert len(crossings) == len(expected) > 0
+        assert np.array_equal(crossings.arm, expected.arm)
+        assert np.max(np.abs(crossings.time - expected.time)) < 1e-6
+
+
+def test_steps_shrink_around_crossings(parameters):
+    stepper = AdaptiveStepper(SimulationEngine(parameters), max_step=10)
+    result = stepper.run(0, 3000)
+    steps = np.diff(result.time)
+
+    crossings = np.concatenate((result.arch_crossings.time, result.log_crossings.time))
+    nearest = np.min(np.abs(result.time[:-1, np.newaxis] - crossings), axis=1)
+    assert np.max(steps) == 10
+    assert np.median(steps[nearest < 0.1]) < 0.1
+    assert np.all(steps >= stepper.min_step)
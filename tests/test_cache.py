@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from explorer.cache import ResultCache, result_arrays, result_key
+from explorer.config import compile_parameters
+from explorer.engine import SimulationEngine
+
+
+def test_round_trip_keeps_values_and_dtypes(parameters, tmp_path):
+    cache = ResultCache(str(tmp_path))
+    result = SimulationEngine(parameters).run(0, 3000, 0.5)
+    cache.put('run', result)
+
+    expected, loaded = result_arrays(result), result_arrays(cache.get('run'))
+    assert expected.keys() == loaded.keys()
+    for name, values in expected.items():
+        assert loaded[name].dtype == np.asarray(values).dtype, name
+        assert np.array_equal(loaded[name], values, equal_nan=True), name
+
+
+def test_missing_entry_is_none(tmp_path):
+    assert ResultCache(str(tmp_path)).get('missing') is None
+
+
+def test_key_depends_on_every_input(parameters):
+    config = compile_parameters(parameters)
+    key = result_key(config, 0, 1000, 0.5, 1e-6)
+
+    assert key == result_key(compile_parameters(parameters), 0, 1000, 0.5, 1e-6)
+    assert key != result_key(config, 0, 1000, 0.25, 1e-6)
+    assert key != result_key(config, 0, 1000, 0.5, 1e-7)
+
+    parameters['log_spirals']['alpha']['value'] = 0.25
+    assert key != result_key(compile_parameters(parameters), 0, 1000, 0.5, 1e-6)
+
+
+def test_least_recently_used_entries_are_evicted(parameters, tmp_path):
+    result = SimulationEngine(parameters).run(0, 1000, 0.5)
+    cache = ResultCache(str(tmp_path))
+    cache.put('first', result)
+    size = cache.nbytes
+
+    cache.max_bytes = 2 * size
+    cache.put('second', result)
+    os.utime(cache._entry('first'), (0, 0))
+    cache.put('third', result)
+
+    assert cache.get('first') is None
+    assert cache.get('second') is not None
+    assert cache.get('third') is not None
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_updated_config_is_not_cached(parameters, tmp_path):
+    cache = ResultCache(str(tmp_path))
+    engine = SimulationEngine(parameters, cache=cache)
+    engine.table(1000)
+
+    parameters['log_spirals']['alpha']['value'] = 0.25
+    engine.update_config(parameters)
+    # only the complete run of the table
+    assert len([name for name in os.listdir(str(tmp_path)) if name.endswith('.npz')]) == 1
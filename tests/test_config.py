@@ -0,0 +1,83 @@
+import math
+
+import pytest
+
+from explorer.config import ConfigError, ModelConfig, changed_groups, compile_parameters
+
+
+def _message(parameters):
+    with pytest.raises(ConfigError) as error:
+        compile_parameters(parameters)
+    return str(error.value)
+
+
+def test_default_parameters_compile(parameters):
+    config = compile_parameters(parameters)
+    assert config.orbit.eccentricity == 0.36
+    assert config.log_spirals.alpha_per_degree == pytest.approx(math.radians(0.218))
+    assert compile_parameters(config) is config
+
+
+def test_missing_key(parameters):
+    del parameters['orbit']['eccentricity']
+    assert _message(parameters) == 'Invalid parameters:\norbit.eccentricity: missing'
+
+    del parameters['arch_spirals']
+    assert _message(parameters) == ('Invalid parameters:\n'
+                                    'orbit.eccentricity: missing\n'
+                                    'arch_spirals.ro: missing\n'
+                                    'arch_spirals.V0: missing\n'
+                                    'arch_spirals.period: missing\n'
+                                    'arch_spirals.rotation: missing')
+
+
+@pytest.mark.parametrize('value, message', [
+    ('3', "'3' is not a number"),
+    (None, 'None is not a number'),
+    (True, 'True is not a number'),
+    (float('inf'), 'inf is not finite'),
+])
+def test_non_numeric_value(parameters, value, message):
+    parameters['log_spirals']['r0']['value'] = value
+    assert _message(parameters) == 'Invalid parameters:\nlog_spirals.r0: ' + message
+
+
+@pytest.mark.parametrize('group, name, value, message', [
+    ('orbit', 'eccentricity', 1, 'must be in [0, 1)'),
+    ('orbit', 'eccentricity', -0.1, 'must be in [0, 1)'),
+    ('orbit', 's_major_axis', 0, 'must be positive'),
+    ('orbit', 'orbit_period', 0, 'must not be zero'),
+    ('log_spirals', 'width', -0.7, 'must not be negative'),
+    ('arch_spirals', 'period', -50, 'must be positive'),
+])
+def test_out_of_range_value(parameters, group, name, value, message):
+    parameters[group][name]['value'] = value
+    assert _message(parameters) == 'Invalid parameters:\n{}.{}: {}'.format(group, name, message)
+
+
+def test_every_error_is_reported(parameters):
+    parameters['orbit']['eccentricity']['value'] = 1.5
+    parameters['log_spirals']['r0']['value'] = 'x'
+    parameters['arch_spirals']['V0']['value'] = -1
+    assert _message(parameters) == ('Invalid parameters:\n'
+                                    'orbit.eccentricity: must be in [0, 1)\n'
+                                    "log_spirals.r0: 'x' is not a number\n"
+                                    'arch_spirals.V0: must be positive')
+
+
+def test_parameters_must_be_a_dict():
+    with pytest.raises(ConfigError, match='parameters must be a dict, got list'):
+        ModelConfig([])
+
+
+def test_changed_groups(parameters):
+    config = compile_parameters(parameters)
+    assert changed_groups(config, compile_parameters(parameters)) == set()
+
+    parameters['log_spirals']['alpha']['value'] = 0.25
+    assert changed_groups(config, compile_parameters(parameters)) == {'log_spirals'}
+
+    parameters['orbit']['sun_rotation']['value'] = 90
+    parameters['arch_spirals']['period']['value'] = 60
+    assert changed_groups(config, compile_parameters(parameters)) == {
+        'orbit', 'log_spirals', 'arch_spirals'}
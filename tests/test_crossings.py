@@ -0,0 +1,72 @@
+import numpy as np
+
+from explorer.crossings import find_roots, sign_changes
+from explorer.engine import SimulationEngine, timeline
+
+
+def test_find_roots_of_known_functions():
+    # roots of sin(t) - level on brackets around k * pi
+    level = np.array([0.0, 0.3, -0.5, 0.9])
+    left = np.array([-0.5, 0.0, 3.0, 0.5])
+    right = np.array([0.5, 1.0, 4.0, 1.5])
+
+    def func(index, row, t):
+        return np.sin(t) - level[row]
+
+    roots = find_roots(func, np.arange(4), left, right, 1e-12)
+    expected = np.array([0.0, np.arcsin(0.3), np.pi + np.arcsin(0.5), np.arcsin(0.9)])
+    assert np.allclose(roots, expected, atol=1e-10)
+
+
+def test_find_roots_do_not_depend_on_the_batch():
+    # a slowly converging bracket must not change the others
+    def func(index, row, t):
+        return np.where(row == 0, (t - 0.3) ** 3, np.cos(t) - 0.5 * row)
+
+    rows = np.array([0, 1, 2, 1])
+    left = np.array([0.0, 0.0, 0.0, 0.5])
+    right = np.array([1.0, 1.5, 2.0, 1.5])
+    together = find_roots(func, rows, left, right, 1e-9)
+
+    for i in range(len(rows)):
+        alone = find_roots(func, rows[i:i + 1], left[i:i + 1], right[i:i + 1], 1e-9)
+        assert alone[0] == together[i]
+
+
+def _reference_roots(values, time):
+    # roots of sampled rows by linear interpolation on a fine grid
+    rows, indexes = sign_changes(values)
+    before, after = values[rows, indexes], values[rows, indexes + 1]
+    roots = time[indexes] + (time[indexes + 1] - time[indexes]) * before / (before - after)
+    order = np.argsort(roots)
+    return roots[order], rows[order]
+
+
+def test_crossings_match_a_fine_step_reference(parameters):
+    engine = SimulationEngine(parameters, tolerance=1e-8)
+    result = engine.run(0, 1000, 0.5)
+
+    fine = engine.evaluate(timeline(0, 1000, 0.001))
+    radii = engine.log_spirals_radii(fine.time, fine.sun_galactic_rotation)
+    roots, arms = _reference_roots(fine.sun_distance - radii, fine.time)
+
+    crossings = result.log_crossings
+    assert len(crossings) == len(roots) > 0
+    assert np.array_equal(crossings.arm, arms)
+    assert np.allclose(crossings.time, roots, atol=1e-5)
+
+    # arm front k is met where the front phase of the sun passes k
+    arch_spirals = engine.config.arch_spirals
+    excess = fine.sun_distance + arch_spirals.V0 * fine.time
+    phase = (excess / arch_spirals.V0 - arch_spirals.FRONT_START) / arch_spirals.spacing
+    front = np.floor(phase)
+    indexes = np.flatnonzero(front[1:] != front[:-1])
+    arm = np.maximum(front[indexes], front[indexes + 1])
+    before, after = phase[indexes] - arm, phase[indexes + 1] - arm
+    roots = fine.time[indexes] + 0.001 * before / (before - after)
+    roots, arm = roots[arm >= 0], arm[arm >= 0]
+
+    crossings = result.arch_crossings
+    assert len(crossings) == len(roots) > 0
+    assert np.array_equal(crossings.arm, arm)
+    assert np.allclose(crossings.time, roots, atol=1e-5)
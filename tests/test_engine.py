@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from explorer.crossings import BandVisits
+from explorer.engine import SimulationEngine, timeline
+
+
+CROSSINGS_COLUMNS = ('time', 'arm', 'distance', 'direction')
+
+
+def _concatenate(chunks, family, name):
+    return np.concatenate([getattr(getattr(chunk, family), name) for chunk in chunks])
+
+
+def _sorted_visits(visits):
+    order = np.lexsort((visits.arm, np.nan_to_num(visits.entry, nan=-np.inf)))
+    return BandVisits(visits.arm[order], visits.entry[order], visits.exit[order])
+
+
+def test_timeline_comes_from_the_step_index():
+    time = timeline(0, 20000, 0.1)
+    assert len(time) == 200001
+    assert time[-1] == 20000
+
+
+@pytest.mark.parametrize('chunk_size', [2, 37, 333, 5000])
+def test_stream_equals_run(parameters, chunk_size):
+    engine = SimulationEngine(parameters)
+    reference = engine.run(0, 3000, 0.5)
+    chunks = list(engine.stream(0, 3000, 0.5, chunk_size))
+
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    assert np.array_equal(np.concatenate([chunk.time for chunk in chunks]), reference.time)
+    assert np.array_equal(np.concatenate([chunk.sun_distance for chunk in chunks]),
+                          reference.sun_distance)
+    assert np.array_equal(np.concatenate([chunk.log_spirals_radii for chunk in chunks], axis=1),
+                          reference.log_spirals_radii)
+
+    for family in ('arch_crossings', 'log_crossings', 'log_band_crossings'):
+        assert len(getattr(reference, family)) > 0
+        for name in CROSSINGS_COLUMNS:
+            assert np.array_equal(_concatenate(chunks, family, name),
+                                  getattr(getattr(reference, family), name))
+
+    visits = _sorted_visits(BandVisits(*(_concatenate(chunks, 'log_band_visits', name)
+                                         for name in ('arm', 'entry', 'exit'))))
+    expected = _sorted_visits(reference.log_band_visits)
+    assert len(expected) > 0
+    assert np.array_equal(visits.arm, expected.arm)
+    assert np.array_equal(visits.entry, expected.entry, equal_nan=True)
+    assert np.array_equal(visits.exit, expected.exit, equal_nan=True)
@@ -0,0 +1,51 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from explorer.engine import SimulationEngine
+from explorer.export import (CROSSINGS_COLUMNS, CROSSINGS_FAMILIES, TRAJECTORY_COLUMNS,
+                             VISITS_COLUMNS, TrajectoryWriter, open_trajectory, result_to_dict)
+
+
+def test_streamed_trajectory_directory_keeps_every_result(parameters, tmp_path):
+    engine = SimulationEngine(parameters)
+    reference = engine.run(0, 3000, 0.5)
+
+    path = str(tmp_path / 'run')
+    with TrajectoryWriter(path, parameters) as writer:
+        for chunk in engine.stream(0, 3000, 0.5, chunk_size=1000):
+            writer.write(chunk)
+    result = open_trajectory(path)
+
+    for name in TRAJECTORY_COLUMNS:
+        assert np.array_equal(getattr(result, name), getattr(reference, name))
+    for family in CROSSINGS_FAMILIES:
+        assert len(getattr(reference, family)) > 0
+        for name, dtype in CROSSINGS_COLUMNS:
+            assert np.array_equal(getattr(getattr(result, family), name),
+                                  getattr(getattr(reference, family), name))
+
+    assert len(result.log_band_visits) == len(reference.log_band_visits) > 0
+    for name, dtype in VISITS_COLUMNS:
+        assert np.array_equal(np.sort(getattr(result.log_band_visits, name)),
+                              np.sort(getattr(reference.log_band_visits, name)),
+                              equal_nan=True)
+
+
+def test_result_to_dict_is_json(parameters):
+    result = SimulationEngine(parameters).run(0, 1000, 0.5)
+    data = json.loads(json.dumps(result_to_dict(result, parameters, trajectory=False)))
+
+    assert 'trajectory' not in data
+    assert data['log_band_crossings']['time'] == result.log_band_crossings.time.tolist()
+    assert len(data['log_band_visits']['arm']) == len(result.log_band_visits)
+
+
+def test_writer_refuses_a_directory_with_files(parameters, tmp_path):
+    (tmp_path / 'notes.txt').write_text('kept')
+
+    with pytest.raises(FileExistsError):
+        TrajectoryWriter(str(tmp_path), parameters)
+    assert os.listdir(str(tmp_path)) == ['notes.txt']
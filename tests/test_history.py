@@ -0,0 +1,48 @@
+import numpy as np
+
+from explorer.history import History
+
+
+def test_count_keeps_growing_in_a_full_ring():
+    history = History(('x', 'y'), 4)
+    history.extend(np.arange(4), np.arange(4))
+    assert (len(history), history.count) == (4, 4)
+
+    history.append(4, 4)
+    history.extend(np.arange(5, 8), np.arange(5, 8))
+    assert (len(history), history.count) == (4, 8)
+
+    history.clear()
+    assert (len(history), history.count) == (0, 0)
+
+
+def test_views_of_a_full_ring_are_contiguous_and_not_copies():
+    history = History(('x', 'y'), 3)
+    history.extend(np.arange(5), -np.arange(5))
+    view = history['x']
+
+    assert view.flags['C_CONTIGUOUS']
+    assert np.shares_memory(view, history._data)
+    assert view.tolist() == [2, 3, 4]
+
+
+def test_ring_wraparound_keeps_the_last_samples_in_order():
+    history = History(('x', 'y'), 5)
+    expected = []
+    for start, count in ((0, 3), (3, 1), (4, 4), (8, 7), (15, 2)):
+        values = np.arange(start, start + count)
+        if count == 1:
+            history.append(values[0], -values[0])
+        else:
+            history.extend(values, -values)
+        expected.extend(values.tolist())
+
+        assert history['x'].tolist() == expected[-5:]
+        assert history['y'].tolist() == [-value for value in expected[-5:]]
+
+
+def test_unbounded_history_grows():
+    history = History(('x',))
+    history.extend(np.arange(3000))
+    history.append(3000)
+    assert history['x'].tolist() == list(range(3001))
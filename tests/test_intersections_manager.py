@@ -0,0 +1,40 @@
+import threading
+
+import numpy as np
+
+from explorer.engine import SimulationEngine
+from explorer.intersections_manager import IntersectionsManager
+
+
+def test_samples_of_the_worker_reach_the_histories_on_flush(qapp, parameters):
+    engine = SimulationEngine(parameters)
+    result = engine.run(0, 1000, 0.5)
+    manager = IntersectionsManager(parameters, engine)
+
+    def simulate():
+        for chunk in np.array_split(np.arange(len(result)), 40):
+            manager.update_batch(result.time[chunk], result.sun_distance[chunk],
+                                 result.sun_galactic_rotation[chunk])
+
+    worker = threading.Thread(target=simulate)
+    worker.start()
+    worker.join()
+    assert len(manager.data_sun) == 0
+
+    manager.flush()
+    assert np.array_equal(manager.data_sun['x'], result.time)
+    assert np.array_equal(manager.data_log_spirals['y3'], result.log_spirals_radii[2])
+    for data, crossings in ((manager.data_arch_spirals, result.arch_crossings),
+                            (manager.data_log_crossings, result.log_crossings),
+                            (manager.data_log_band, result.log_band_crossings)):
+        assert np.allclose(np.sort(data['x']), crossings.time, rtol=0, atol=1e-9)
+
+
+def test_restart_drops_the_queued_samples(qapp, parameters):
+    engine = SimulationEngine(parameters)
+    manager = IntersectionsManager(parameters, engine, history_length=10)
+    manager.update_batch(np.arange(5.0), np.full(5, 8.0), np.zeros(5))
+
+    manager.restart()
+    manager.flush()
+    assert len(manager.data_sun) == 0
@@ -0,0 +1,31 @@
+import math
+
+import numpy as np
+import pytest
+
+from explorer.laws_motions import EllipticalKeplersMotion, solve_kepler
+
+
+@pytest.mark.parametrize('eccentricity', [0.0, 0.36, 0.9, 0.99, 0.999])
+def test_solve_kepler_residual(eccentricity):
+    M = np.linspace(-50, 50, 100001)
+    E = solve_kepler(M, eccentricity)
+    residual = E - eccentricity * np.sin(E) - M
+    assert np.max(np.abs(residual)) < 1e-10
+
+
+def test_solve_kepler_does_not_depend_on_the_batch():
+    M = np.linspace(-10, 10, 1001)
+    together = solve_kepler(M, 0.9)
+    alone = np.array([solve_kepler(M[i:i + 1], 0.9)[0] for i in range(len(M))])
+    assert np.array_equal(together, alone)
+
+
+def test_scalar_state_matches_evaluate():
+    motion = EllipticalKeplersMotion(250, 8.45, 0.36, math.radians(100))
+    times = np.linspace(0, 50000, 501)
+    distance, _, full_rotation = motion.evaluate(times)
+
+    for i, time in enumerate(times):
+        assert motion.state(time) == pytest.approx((distance[i], full_rotation[i]), abs=1e-9)
+        assert motion.full_rotation(time) == pytest.approx(full_rotation[i], abs=1e-9)
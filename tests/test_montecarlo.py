@@ -0,0 +1,56 @@
+import numpy as np
+
+from explorer.config import ConfigError, compile_parameters
+from explorer.engine import SimulationEngine
+from explorer.montecarlo import crossing_statistics, monte_carlo, sample_parameters
+
+
+def test_valid_samples_are_those_model_config_accepts(parameters):
+    parameters['orbit']['eccentricity']['sigma'] = 0.5
+    parameters['log_spirals']['width']['range'] = [-1, 1]
+    samples, valid = sample_parameters(parameters, 200, seed=0)
+    assert 0 < valid.sum() < 200
+
+    for i in range(200):
+        for key, values in samples.items():
+            group, name = key.split('.')
+            parameters[group][name]['value'] = float(values[i])
+        try:
+            compile_parameters(parameters)
+        except ConfigError:
+            assert not valid[i]
+        else:
+            assert valid[i]
+
+
+def test_monte_carlo_matches_runs_of_each_sample(parameters):
+    parameters['orbit']['sun_rotation']['sigma'] = 10
+    parameters['log_spirals']['alpha']['range'] = [0.2, 0.24]
+    parameters['arch_spirals']['V0']['sigma'] = 0.01
+    arch, log, count = monte_carlo(parameters, 6, 0, 1000, 0.5, seed=1, processes=1,
+                                   chunk_size=4)
+    samples, valid = sample_parameters(parameters, 6, seed=1)
+    assert count == valid.sum() == 6
+
+    arch_times = []
+    for i in range(count):
+        for key, values in samples.items():
+            group, name = key.split('.')
+            parameters[group][name]['value'] = float(values[i])
+        result = SimulationEngine(parameters).run(0, 1000, 0.5)
+        arch_times.append(result.arch_crossings.time)
+
+        for crossings, expected in ((arch, result.arch_crossings),
+                                    (log, result.log_crossings)):
+            mine = crossings.star == i
+            order = np.lexsort((crossings.arm[mine], crossings.time[mine]))
+            assert len(expected) > 0
+            assert np.array_equal(crossings.arm[mine][order], expected.arm)
+            assert np.allclose(crossings.time[mine][order], expected.time, rtol=0, atol=1e-9)
+
+    rows = crossing_statistics(arch, count)
+    assert sum(row['fraction'] for row in rows) * count == len(arch)
+    # every sample has the earliest arch crossing
+    first = min(rows, key=lambda row: row['mean'])
+    assert first['fraction'] == 1
+    assert np.isclose(first['mean'], np.mean([times[0] for times in arch_times]))
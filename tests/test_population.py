@@ -0,0 +1,50 @@
+import numpy as np
+
+from explorer.engine import SimulationEngine
+from explorer.population import Population, PopulationEngine, sample_population
+
+
+def _subset(population, stars):
+    return Population(population.s_major_axis[stars], population.eccentricity[stars],
+                      population.start_rotation[stars], population.orientation[stars],
+                      population.period[stars])
+
+
+def test_stars_do_not_depend_on_the_population(parameters):
+    # every star is refined on its own brackets, whatever else is in the batch
+    population = sample_population(parameters, 20, seed=0)
+    arch, log = PopulationEngine(parameters, population).run(0, 1000, 5)
+    assert len(arch) > 0 and len(log) > 0
+
+    for star in (0, 7, 19):
+        alone = PopulationEngine(parameters, _subset(population, [star])).run(0, 1000, 5)
+        for crossings, expected in zip((arch, log), alone):
+            mine = crossings.star == star
+            order = np.lexsort((crossings.arm[mine], crossings.time[mine]))
+            assert np.array_equal(crossings.time[mine][order], expected.time)
+            assert np.array_equal(crossings.arm[mine][order], expected.arm)
+            assert np.array_equal(crossings.direction[mine][order], expected.direction)
+
+
+def test_stars_on_orbits_of_the_sun_cross_as_the_sun(parameters):
+    # (s_major_axis, eccentricity, sun_rotation, sun_period) of each star,
+    # with the orientation of the sun's orbit
+    orbits = [(8.45, 0.36, 100, 250), (7.0, 0.2, 30, 180), (11.0, 0.05, -60, 400)]
+    a, e, rotation, period = np.array(orbits).T
+    population = Population(a, e, np.radians(rotation), np.zeros(len(orbits)), period)
+    arch, log = PopulationEngine(parameters, population).run(0, 2000, 0.5)
+
+    for star, values in enumerate(orbits):
+        for name, value in zip(('s_major_axis', 'eccentricity', 'sun_rotation', 'sun_period'),
+                               values):
+            parameters['orbit'][name]['value'] = value
+        result = SimulationEngine(parameters).run(0, 2000, 0.5)
+
+        for crossings, expected in ((arch, result.arch_crossings),
+                                    (log, result.log_crossings)):
+            mine = crossings.star == star
+            order = np.lexsort((crossings.arm[mine], crossings.time[mine]))
+            assert len(expected) > 0
+            assert np.array_equal(crossings.arm[mine][order], expected.arm)
+            assert np.array_equal(crossings.direction[mine][order], expected.direction)
+            assert np.allclose(crossings.time[mine][order], expected.time, rtol=0, atol=1e-9)
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+from explorer.engine import SimulationEngine
+from explorer.sweep import apply_overrides, main, summary, sweep
+
+
+def test_summary_fields(parameters):
+    engine = SimulationEngine(parameters)
+    result = engine.run(0, 2000, 0.5)
+    row = summary(engine, 0, 2000, 0.5)
+
+    assert row['log_count'] == len(result.log_crossings)
+    assert row['log_crossing_interval'] == np.diff(result.log_crossings.time).tolist()
+    assert len(row['log_band_residence']) == len(result.log_band_visits)
+
+
+def test_sweep_rows_follow_the_overrides(parameters):
+    sets = [{'eccentricity': 0.3}, {'log_spirals.alpha': 0.25}]
+    rows = sorted(sweep(parameters, sets, 0, 1000, 0.5, processes=1),
+                  key=lambda row: row['index'])
+
+    for row, overrides in zip(rows, sets):
+        engine = SimulationEngine(apply_overrides(parameters, overrides))
+        assert row['parameters'] == overrides
+        assert row == dict(row, **summary(engine, 0, 1000, 0.5))
+
+
+@pytest.mark.parametrize('grid, message', [
+    ('foo.bar=1', 'Unknown parameter foo.bar'),
+    ('nokey=1', 'Unknown parameter nokey'),
+    ('period=1,2', 'Parameter period must be given as group.period'),
+    ('eccentricity', 'expected KEY=start:stop:count'),
+    ('eccentricity=0.1:0.3', 'expected KEY=start:stop:count'),
+])
+def test_bad_grid_is_a_usage_error(parameters, tmp_path, capsys, grid, message):
+    path = tmp_path / 'parameters.json'
+    path.write_text(json.dumps(parameters))
+
+    with pytest.raises(SystemExit) as error:
+        main([str(path), '--grid', grid, '--processes', '1'])
+    assert error.value.code == 2
+    assert message in capsys.readouterr().err